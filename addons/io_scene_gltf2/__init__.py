@@ -518,12 +518,36 @@ class ImportGLTF2(Operator, ImportHelper):
         description="How normals are computed during import",
         default="NORMALS")
 
+    import_scene = StringProperty(
+        name='Scene',
+        description='Index or name of the only scene to import. Empty imports all scenes',
+        default=''
+    )
+
+    import_node_names = StringProperty(
+        name='Node Names',
+        description='Import only nodes with names matching this pattern (* and ? wildcards), with their children',
+        default=''
+    )
+
+    import_node_indices = StringProperty(
+        name='Node Indices',
+        description='Import only these nodes (comma separated indices), with their children',
+        default=''
+    )
+
     def draw(self, context):
         layout = self.layout
 
         layout.prop(self, 'import_pack_images')
         layout.prop(self, 'import_shading')
 
+        col = layout.box().column()
+        col.label(text='Partial Import:')
+        col.prop(self, 'import_scene')
+        col.prop(self, 'import_node_names')
+        col.prop(self, 'import_node_indices')
+
     def execute(self, context):
         return self.import_gltf2(context)
 
@@ -536,19 +560,34 @@ class ImportGLTF2(Operator, ImportHelper):
         import_settings = self.as_keywords()
 
         self.gltf_importer = glTFImporter(self.filepath, import_settings)
-        success, txt = self.gltf_importer.read()
-        if not success:
-            self.report({'ERROR'}, txt)
-            return {'CANCELLED'}
-        success, txt = self.gltf_importer.checks()
-        if not success:
-            self.report({'ERROR'}, txt)
-            return {'CANCELLED'}
-        self.gltf_importer.log.critical("Data are loaded, start creating Blender stuff")
-        start_time = time.time()
-        BlenderGlTF.create(self.gltf_importer)
-        elapsed_s = "{:.2f}s".format(time.time() - start_time)
-        self.gltf_importer.log.critical("glTF import finished in " + elapsed_s)
+        try:
+            success, txt = self.gltf_importer.read()
+            if not success:
+                self.report({'ERROR'}, txt)
+                return {'CANCELLED'}
+            success, txt = self.gltf_importer.checks()
+            if not success:
+                self.report({'ERROR'}, txt)
+                return {'CANCELLED'}
+            success, txt = self.gltf_importer.select()
+            if not success:
+                self.report({'ERROR'}, txt)
+                return {'CANCELLED'}
+            self.gltf_importer.prefetch()
+            self.gltf_importer.log.critical("Data are loaded, start creating Blender stuff")
+            start_time = time.time()
+            BlenderGlTF.create(self.gltf_importer)
+            elapsed_s = "{:.2f}s".format(time.time() - start_time)
+            self.gltf_importer.log.critical("glTF import finished in " + elapsed_s)
+            self.gltf_importer.log.info("Accessor cache: " + str(self.gltf_importer.accessor_cache.hits) + " hits, "
+                                        + str(self.gltf_importer.accessor_cache.misses) + " misses")
+            self.gltf_importer.log.info("Images: " + str(self.gltf_importer.image_dedup_count)
+                                        + " deduplicated by content")
+            if self.gltf_importer.image_dedup_count > 0:
+                self.report({'INFO'}, str(self.gltf_importer.image_dedup_count) + " duplicate images shared")
+        finally:
+            # Unmap buffers, even if import failed
+            self.gltf_importer.close()
         self.gltf_importer.log.removeHandler(self.gltf_importer.log_handler)
 
         return {'FINISHED'}
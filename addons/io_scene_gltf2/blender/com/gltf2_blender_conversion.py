@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import numpy as np
 from mathutils import Matrix, Quaternion
 from math import sqrt, sin, cos
 
@@ -47,6 +48,90 @@ def correction_rotation():
     # and lamps has no vertices :)
     return Quaternion((sqrt(2)/2, -sqrt(2)/2, 0.0, 0.0)).to_matrix().to_4x4()
 
+def matrix_to_array(mat):
+    """Matrix (mathutils) to numpy array, row major."""
+    return np.array([list(row) for row in mat], dtype=np.float64)
+
+def quaternions_gltf_to_blender(values):
+    """Quaternions (n, 4) array from glTF (x, y, z, w) to Blender (w, x, y, z)."""
+    return np.asarray(values, dtype=np.float64)[:, [3, 0, 1, 2]]
+
+def quaternions_multiply(a, b):
+    """Hamilton product of (n, 4) or (4,) quaternion arrays, in Blender (w, x, y, z) order."""
+    aw, ax, ay, az = np.moveaxis(np.asarray(a), -1, 0)
+    bw, bx, by, bz = np.moveaxis(np.asarray(b), -1, 0)
+    return np.stack([
+        aw * bw - ax * bx - ay * by - az * bz,
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+    ], axis=-1)
+
+def quaternion_inverted(q):
+    """Inverse of a (4,) quaternion array, as Quaternion.inverted() (not normalized)."""
+    q = np.asarray(q, dtype=np.float64)
+    return q * np.array([1.0, -1.0, -1.0, -1.0]) / np.dot(q, q)
+
+def quaternions_to_matrices(q):
+    """Rotation matrices (n, 3, 3) of normalized (n, 4) quaternions, in Blender (w, x, y, z) order."""
+    w, x, y, z = q.T
+    mats = np.empty((len(q), 3, 3))
+    mats[:, 0, 0] = 1 - 2 * (y * y + z * z)
+    mats[:, 0, 1] = 2 * (x * y - w * z)
+    mats[:, 0, 2] = 2 * (x * z + w * y)
+    mats[:, 1, 0] = 2 * (x * y + w * z)
+    mats[:, 1, 1] = 1 - 2 * (x * x + z * z)
+    mats[:, 1, 2] = 2 * (y * z - w * x)
+    mats[:, 2, 0] = 2 * (x * z - w * y)
+    mats[:, 2, 1] = 2 * (y * z + w * x)
+    mats[:, 2, 2] = 1 - 2 * (x * x + y * y)
+    return mats
+
+def matrices_to_quaternions(mats):
+    """Quaternions (n, 4) of (n, 3, 3) matrices, as Matrix.to_quaternion() (columns are normalized first)."""
+    m = mats / np.linalg.norm(mats, axis=1)[:, np.newaxis, :]
+    m00, m11, m22 = m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]
+    q = np.empty((len(m), 4))
+
+    # Same threshold and cases as Blender mat3_normalized_to_quat, so that quaternion signs are the same
+    trace = 0.25 * (1 + m00 + m11 + m22)
+    case_w = trace > np.float32(1e-4)
+    case_x = ~case_w & (m00 > m11) & (m00 > m22)
+    case_y = ~case_w & ~case_x & (m11 > m22)
+    case_z = ~case_w & ~case_x & ~case_y
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.sqrt(trace)
+        inv = 1 / (4 * s)
+        q_w = np.stack([s, (m[:, 2, 1] - m[:, 1, 2]) * inv, (m[:, 0, 2] - m[:, 2, 0]) * inv,
+                        (m[:, 1, 0] - m[:, 0, 1]) * inv], axis=-1)
+        s = 2 * np.sqrt(1 + m00 - m11 - m22)
+        q_x = np.stack([(m[:, 2, 1] - m[:, 1, 2]) / s, 0.25 * s, (m[:, 0, 1] + m[:, 1, 0]) / s,
+                        (m[:, 0, 2] + m[:, 2, 0]) / s], axis=-1)
+        s = 2 * np.sqrt(1 + m11 - m00 - m22)
+        q_y = np.stack([(m[:, 0, 2] - m[:, 2, 0]) / s, (m[:, 0, 1] + m[:, 1, 0]) / s, 0.25 * s,
+                        (m[:, 1, 2] + m[:, 2, 1]) / s], axis=-1)
+        s = 2 * np.sqrt(1 + m22 - m00 - m11)
+        q_z = np.stack([(m[:, 1, 0] - m[:, 0, 1]) / s, (m[:, 0, 2] + m[:, 2, 0]) / s,
+                        (m[:, 1, 2] + m[:, 2, 1]) / s, 0.25 * s], axis=-1)
+
+    q[case_w] = q_w[case_w]
+    q[case_x] = q_x[case_x]
+    q[case_y] = q_y[case_y]
+    q[case_z] = q_z[case_z]
+    return q / np.linalg.norm(q, axis=1)[:, np.newaxis]
+
+def quaternions_make_compatible(q):
+    """Flip quaternions of (n, 4) array, so that each one is on the same side as the previous one.
+
+    Avoids interpolating the long way between antipodal quaternions.
+    """
+    if len(q) < 2:
+        return q
+    dots = np.einsum('ij,ij->i', q[1:], q[:-1])
+    signs = np.concatenate([[1.0], np.cumprod(np.where(dots < 0, -1.0, 1.0))])
+    return q * signs[:, np.newaxis]
+
 def texture_transform_blender_to_gltf(mapping_transform):
     """
     Converts the offset/rotation/scale from a Mapping node applied in Blender's
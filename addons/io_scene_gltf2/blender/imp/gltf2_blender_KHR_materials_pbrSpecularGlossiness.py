@@ -91,11 +91,11 @@ class BlenderKHR_materials_pbrSpecularGlossiness():
 
             # create UV Map / Mapping / Texture nodes / separate & math and combine
             text_node = node_tree.nodes.new('ShaderNodeTexImage')
-            if gltf.data.images[
+            if gltf.image_states[
                 gltf.data.textures[pbrSG['diffuseTexture']['index']].source].blender_image_name is not None:
                 text_node.image = \
                     bpy.data.images[
-                        gltf.data.images[
+                        gltf.image_states[
                             gltf.data.textures[pbrSG['diffuseTexture']['index']].source].blender_image_name
                     ]
             text_node.location = -1000, 500
@@ -202,10 +202,10 @@ class BlenderKHR_materials_pbrSpecularGlossiness():
 
             # create UV Map / Mapping / Texture nodes / separate & math and combine
             text_node = node_tree.nodes.new('ShaderNodeTexImage')
-            if gltf.data.images[
+            if gltf.image_states[
                 gltf.data.textures[pbrSG['diffuseTexture']['index']].source].blender_image_name is not None:
                 text_node.image = bpy.data.images[
-                    gltf.data.images[gltf.data.textures[pbrSG['diffuseTexture']['index']].source].blender_image_name
+                    gltf.image_states[gltf.data.textures[pbrSG['diffuseTexture']['index']].source].blender_image_name
                 ]
             if vertex_color:
                 text_node.location = -2000, 500
@@ -277,11 +277,11 @@ class BlenderKHR_materials_pbrSpecularGlossiness():
         elif pbrSG['specgloss_type'] == gltf.TEXTURE:
             BlenderTextureInfo.create(gltf, pbrSG['specularGlossinessTexture'], dict_=True)
             spec_text = node_tree.nodes.new('ShaderNodeTexImage')
-            if gltf.data.images[
+            if gltf.image_states[
                 gltf.data.textures[pbrSG['specularGlossinessTexture']['index']].source
             ].blender_image_name is not None:
                 spec_text.image = bpy.data.images[
-                    gltf.data.images[
+                    gltf.image_states[
                         gltf.data.textures[pbrSG['specularGlossinessTexture']['index']].source
                     ].blender_image_name
                 ]
@@ -321,10 +321,10 @@ class BlenderKHR_materials_pbrSpecularGlossiness():
             BlenderTextureInfo.create(gltf, pbrSG['specularGlossinessTexture'], dict_=True)
 
             spec_text = node_tree.nodes.new('ShaderNodeTexImage')
-            if gltf.data.images[
+            if gltf.image_states[
                 gltf.data.textures[pbrSG['specularGlossinessTexture']['index']].source
             ].blender_image_name is not None:
-                spec_text.image = bpy.data.images[gltf.data.images[
+                spec_text.image = bpy.data.images[gltf.image_states[
                     gltf.data.textures[pbrSG['specularGlossinessTexture']['index']].source
                 ].blender_image_name]
             if bpy.app.version < (2, 80, 0):
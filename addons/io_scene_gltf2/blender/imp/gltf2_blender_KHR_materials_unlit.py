@@ -44,7 +44,10 @@ class BlenderKHR_materials_unlit():
             pbr["metallicFactor"] = 1.0
             pbr["roughnessFactor"] = 1.0
             pymaterial.pbr_metallic_roughness = MaterialPBRMetallicRoughness.from_dict(pbr)
-            pymaterial.pbr_metallic_roughness.color_type = gltf.SIMPLE
-            pymaterial.pbr_metallic_roughness.metallic_type = gltf.SIMPLE
+            gltf.material_states[material_index].color_type = gltf.SIMPLE
+            gltf.material_states[material_index].metallic_type = gltf.SIMPLE
 
-        BlenderPbr.create_nodetree(gltf, pymaterial.pbr_metallic_roughness, mat_name, vertex_color, nodetype='unlit')
+        BlenderPbr.create_nodetree(
+            gltf, pymaterial.pbr_metallic_roughness, gltf.material_states[material_index], mat_name, vertex_color,
+            nodetype='unlit'
+        )
@@ -14,11 +14,13 @@
 
 import json
 import bpy
-from mathutils import Matrix
+import numpy as np
 
-from ..com.gltf2_blender_conversion import loc_gltf_to_blender, quaternion_gltf_to_blender, scale_to_matrix
+from ..com.gltf2_blender_conversion import loc_gltf_to_blender, quaternions_gltf_to_blender, matrix_to_array
+from ..com.gltf2_blender_conversion import quaternions_multiply, quaternion_inverted, quaternions_make_compatible
+from ..com.gltf2_blender_conversion import quaternions_to_matrices, matrices_to_quaternions
 from ...io.imp.gltf2_io_binary import BinaryData
-from .gltf2_blender_animation_utils import simulate_stash, restore_last_action
+from .gltf2_blender_animation_utils import simulate_stash, restore_last_action, set_interpolation
 
 
 class BlenderBoneAnim():
@@ -26,26 +28,12 @@ class BlenderBoneAnim():
     def __new__(cls, *args, **kwargs):
         raise RuntimeError("%s should not be instantiated" % cls)
 
-    @staticmethod
-    def set_interpolation(interpolation, kf):
-        """Set interpolation."""
-        if interpolation == "LINEAR":
-            kf.interpolation = 'LINEAR'
-        elif interpolation == "STEP":
-            kf.interpolation = 'CONSTANT'
-        elif interpolation == "CUBICSPLINE":
-            kf.interpolation = 'BEZIER'
-            kf.handle_right_type = 'AUTO'
-            kf.handle_left_type = 'AUTO'
-        else:
-            kf.interpolation = 'LINEAR'
-
     @staticmethod
     def stash_action(gltf, anim_idx, node_idx, action_name):
-        node = gltf.data.nodes[node_idx]
-        obj = bpy.data.objects[gltf.data.skins[node.skin_id].blender_armature_name]
+        node_state = gltf.node_states[node_idx]
+        obj = bpy.data.objects[gltf.skin_states[node_state.skin_id].blender_armature_name]
 
-        if anim_idx not in node.animations.keys():
+        if anim_idx not in node_state.animations.keys():
             return
 
         if (obj.name, action_name) in gltf.actions_stashed.keys():
@@ -59,55 +47,53 @@ class BlenderBoneAnim():
 
     @staticmethod
     def restore_last_action(gltf, node_idx):
-        node = gltf.data.nodes[node_idx]
-        obj = bpy.data.objects[gltf.data.skins[node.skin_id].blender_armature_name]
+        node_state = gltf.node_states[node_idx]
+        obj = bpy.data.objects[gltf.skin_states[node_state.skin_id].blender_armature_name]
 
         restore_last_action(obj)
 
     @staticmethod
-    def parse_translation_channel(gltf, node, obj, bone, channel, animation):
+    def get_keyframe_values(gltf, animation, channel):
+        """Keys (n,) and values (n, components) arrays of channel, without cubic spline tangents."""
+        keys = BinaryData.decode_accessor(gltf, animation.samplers[channel.sampler].input)[:, 0]
+        values = BinaryData.decode_accessor(gltf, animation.samplers[channel.sampler].output)
+
+        if animation.samplers[channel.sampler].interpolation == "CUBICSPLINE":
+            # TODO manage tangent?
+            values = values[1::3][:len(keys)]
+
+        return keys, values.astype(np.float64)
+
+    @staticmethod
+    def get_parent_bone_matrix(gltf, node_state):
+        """Bind matrix of parent bone, identity if parent is not a bone."""
+        if node_state.parent is None or not gltf.node_states[node_state.parent].is_joint:
+            return None
+        return gltf.node_states[node_state.parent].blender_bone_matrix
+
+    @staticmethod
+    def parse_translation_channel(gltf, node_state, obj, bone, channel, animation):
         """Manage Location animation."""
         blender_path = "pose.bones[" + json.dumps(bone.name) + "].location"
         group_name = bone.name
 
-        keys = BinaryData.get_data_from_accessor(gltf, animation.samplers[channel.sampler].input)
-        values = BinaryData.get_data_from_accessor(gltf, animation.samplers[channel.sampler].output)
-        if bpy.app.version < (2, 80, 0):
-            inv_bind_matrix = node.blender_bone_matrix.to_quaternion().to_matrix().to_4x4().inverted() \
-                * Matrix.Translation(node.blender_bone_matrix.to_translation()).inverted()
-        else:
-            inv_bind_matrix = node.blender_bone_matrix.to_quaternion().to_matrix().to_4x4().inverted() \
-                @ Matrix.Translation(node.blender_bone_matrix.to_translation()).inverted()
-
-        if animation.samplers[channel.sampler].interpolation == "CUBICSPLINE":
-            # TODO manage tangent?
-            translation_keyframes = (
-                loc_gltf_to_blender(values[idx * 3 + 1])
-                for idx in range(0, len(keys))
-            )
-        else:
-            translation_keyframes = (loc_gltf_to_blender(vals) for vals in values)
-        if node.parent is None:
-            parent_mat = Matrix()
-        else:
-            if not gltf.data.nodes[node.parent].is_joint:
-                parent_mat = Matrix()
-            else:
-                parent_mat = gltf.data.nodes[node.parent].blender_bone_matrix
+        keys, values = BlenderBoneAnim.get_keyframe_values(gltf, animation, channel)
+        translations = loc_gltf_to_blender(values)
 
         # Pose is in object (armature) space and it's value if the offset from the bind pose
         # (which is also in object space)
         # Scale is not taken into account
-        if bpy.app.version < (2, 80, 0):
-            final_translations = [
-                inv_bind_matrix * (parent_mat * Matrix.Translation(translation_keyframe)).to_translation()
-                for translation_keyframe in translation_keyframes
-            ]
-        else:
-            final_translations = [
-                inv_bind_matrix @ (parent_mat @ Matrix.Translation(translation_keyframe)).to_translation()
-                for translation_keyframe in translation_keyframes
-            ]
+        # final = inverse bind rotation * (-bind location + parent matrix * translation), for all keys at once
+        bind_matrix = node_state.blender_bone_matrix
+        inv_bind_rotation = matrix_to_array(bind_matrix.to_quaternion().to_matrix()).T
+        inv_bind_location = -np.array(bind_matrix.to_translation())
+
+        parent_mat = BlenderBoneAnim.get_parent_bone_matrix(gltf, node_state)
+        if parent_mat is not None:
+            parent_mat = matrix_to_array(parent_mat)
+            translations = translations @ parent_mat[:3, :3].T + parent_mat[:3, 3]
+
+        final_translations = (translations + inv_bind_location) @ inv_bind_rotation.T
 
         BlenderBoneAnim.fill_fcurves(
             obj.animation_data.action,
@@ -119,67 +105,27 @@ class BlenderBoneAnim():
         )
 
     @staticmethod
-    def parse_rotation_channel(gltf, node, obj, bone, channel, animation):
+    def parse_rotation_channel(gltf, node_state, obj, bone, channel, animation):
         """Manage rotation animation."""
         blender_path = "pose.bones[" + json.dumps(bone.name) + "].rotation_quaternion"
         group_name = bone.name
 
-        keys = BinaryData.get_data_from_accessor(gltf, animation.samplers[channel.sampler].input)
-        values = BinaryData.get_data_from_accessor(gltf, animation.samplers[channel.sampler].output)
-        bind_rotation = node.blender_bone_matrix.to_quaternion()
+        keys, values = BlenderBoneAnim.get_keyframe_values(gltf, animation, channel)
+        quats = quaternions_gltf_to_blender(values)
 
-        if animation.samplers[channel.sampler].interpolation == "CUBICSPLINE":
-            # TODO manage tangent?
-            quat_keyframes = [
-                quaternion_gltf_to_blender(values[idx * 3 + 1])
-                for idx in range(0, len(keys))
-            ]
-        else:
-            quat_keyframes = [quaternion_gltf_to_blender(vals) for vals in values]
+        parent_mat = BlenderBoneAnim.get_parent_bone_matrix(gltf, node_state)
+        if parent_mat is not None and parent_mat != parent_mat.inverted():
+            # Rotation of parent matrix * rotation matrix
+            parent_mat = matrix_to_array(parent_mat)[:3, :3]
+            quats = quats / np.linalg.norm(quats, axis=1)[:, np.newaxis]
+            quats = matrices_to_quaternions(parent_mat @ quaternions_to_matrices(quats))
 
-
-        if node.parent is None:
-            if bpy.app.version < (2, 80, 0):
-                final_rots = [
-                    bind_rotation.inverted() * quat_keyframe
-                    for quat_keyframe in quat_keyframes
-                ]
-            else:
-                final_rots = [
-                    bind_rotation.inverted() @ quat_keyframe
-                    for quat_keyframe in quat_keyframes
-                ]
-        else:
-            if not gltf.data.nodes[node.parent].is_joint:
-                parent_mat = Matrix()
-            else:
-                parent_mat = gltf.data.nodes[node.parent].blender_bone_matrix
-
-            if parent_mat != parent_mat.inverted():
-                if bpy.app.version < (2, 80, 0):
-                    final_rots = [
-                        bind_rotation.rotation_difference(
-                            (parent_mat * quat_keyframe.to_matrix().to_4x4()).to_quaternion()
-                        )
-                        for quat_keyframe in quat_keyframes
-                    ]
-                else:
-                    final_rots = [
-                        bind_rotation.rotation_difference(
-                            (parent_mat @ quat_keyframe.to_matrix().to_4x4()).to_quaternion()
-                        )
-                        for quat_keyframe in quat_keyframes
-                    ]
-            else:
-                final_rots = [
-                    bind_rotation.rotation_difference(quat_keyframe)
-                    for quat_keyframe in quat_keyframes
-                ]
+        # Rotation difference from bind rotation
+        bind_rotation = np.array(node_state.blender_bone_matrix.to_quaternion())
+        final_rots = quaternions_multiply(quaternion_inverted(bind_rotation), quats)
 
         # Manage antipodal quaternions
-        for i in range(1, len(final_rots)):
-            if final_rots[i].dot(final_rots[i-1]) < 0:
-                final_rots[i] = -final_rots[i]
+        final_rots = quaternions_make_compatible(final_rots)
 
         BlenderBoneAnim.fill_fcurves(
             obj.animation_data.action,
@@ -191,50 +137,22 @@ class BlenderBoneAnim():
         )
 
     @staticmethod
-    def parse_scale_channel(gltf, node, obj, bone, channel, animation):
+    def parse_scale_channel(gltf, node_state, obj, bone, channel, animation):
         """Manage scaling animation."""
         blender_path = "pose.bones[" + json.dumps(bone.name) + "].scale"
         group_name = bone.name
 
-        keys = BinaryData.get_data_from_accessor(gltf, animation.samplers[channel.sampler].input)
-        values = BinaryData.get_data_from_accessor(gltf, animation.samplers[channel.sampler].output)
-        bind_scale = scale_to_matrix(node.blender_bone_matrix.to_scale())
+        keys, values = BlenderBoneAnim.get_keyframe_values(gltf, animation, channel)
+        scales = loc_gltf_to_blender(values)
 
-        if animation.samplers[channel.sampler].interpolation == "CUBICSPLINE":
-            # TODO manage tangent?
-            scale_mats = (
-                scale_to_matrix(loc_gltf_to_blender(values[idx * 3 + 1]))
-                for idx in range(0, len(keys))
-            )
-        else:
-            scale_mats = (scale_to_matrix(loc_gltf_to_blender(vals)) for vals in values)
-        if node.parent is None:
-            if bpy.app.version < (2, 80, 0):
-                final_scales = [
-                    (bind_scale.inverted() * scale_mat).to_scale()
-                    for scale_mat in scale_mats
-                ]
-            else:
-                final_scales = [
-                    (bind_scale.inverted() @ scale_mat).to_scale()
-                    for scale_mat in scale_mats
-                ]
-        else:
-            if not gltf.data.nodes[node.parent].is_joint:
-                parent_mat = Matrix()
-            else:
-                parent_mat = gltf.data.nodes[node.parent].blender_bone_matrix
+        # Scale matrices are diagonal: scale offset from bind scale (times parent bind scale) is a division
+        factors = 1 / np.array(node_state.blender_bone_matrix.to_scale())
+        parent_mat = BlenderBoneAnim.get_parent_bone_matrix(gltf, node_state)
+        if parent_mat is not None:
+            factors = factors * np.array(parent_mat.to_scale())
 
-            if bpy.app.version < (2, 80, 0):
-                final_scales = [
-                    (bind_scale.inverted() * scale_to_matrix(parent_mat.to_scale()) * scale_mat).to_scale()
-                    for scale_mat in scale_mats
-                ]
-            else:
-                final_scales = [
-                    (bind_scale.inverted() @ scale_to_matrix(parent_mat.to_scale()) @ scale_mat).to_scale()
-                    for scale_mat in scale_mats
-                ]
+        # As Matrix.to_scale(), scales are positive
+        final_scales = np.abs(scales * factors)
 
         BlenderBoneAnim.fill_fcurves(
             obj.animation_data.action,
@@ -247,37 +165,36 @@ class BlenderBoneAnim():
 
     @staticmethod
     def fill_fcurves(action, keys, values, group_name, blender_path, interpolation):
-        """Create FCurves from the keyframe-value pairs (one per component)."""
+        """Create FCurves from keys (n,) and values (n, components) arrays (one per component)."""
         fps = bpy.context.scene.render.fps
 
-        coords = [0] * (2 * len(keys))
-        coords[::2] = (key[0] * fps for key in keys)
+        coords = np.empty((len(keys), 2), dtype=np.float32)
+        coords[:, 0] = keys * fps
 
         if group_name not in action.groups:
             action.groups.new(group_name)
         group = action.groups[group_name]
 
-        for i in range(0, len(values[0])):
+        for i in range(values.shape[1]):
             fcurve = action.fcurves.new(data_path=blender_path, index=i)
             fcurve.group = group
 
             fcurve.keyframe_points.add(len(keys))
-            coords[1::2] = (vals[i] for vals in values)
-            fcurve.keyframe_points.foreach_set('co', coords)
+            coords[:, 1] = values[:, i]
+            fcurve.keyframe_points.foreach_set('co', coords.reshape(-1))
 
             # Setting interpolation
-            for kf in fcurve.keyframe_points:
-                BlenderBoneAnim.set_interpolation(interpolation, kf)
+            set_interpolation(fcurve.keyframe_points, interpolation)
             fcurve.update() # force updating tangents (this may change when tangent will be managed)
 
     @staticmethod
     def anim(gltf, anim_idx, node_idx):
         """Manage animation."""
-        node = gltf.data.nodes[node_idx]
-        obj = bpy.data.objects[gltf.data.skins[node.skin_id].blender_armature_name]
-        bone = obj.pose.bones[node.blender_bone_name]
+        node_state = gltf.node_states[node_idx]
+        obj = bpy.data.objects[gltf.skin_states[node_state.skin_id].blender_armature_name]
+        bone = obj.pose.bones[node_state.blender_bone_name]
 
-        if anim_idx not in node.animations.keys():
+        if anim_idx not in node_state.animations.keys():
             return
 
         animation = gltf.data.animations[anim_idx]
@@ -315,17 +232,17 @@ class BlenderBoneAnim():
             obj.animation_data_create()
         obj.animation_data.action = bpy.data.actions[action.name]
 
-        for channel_idx in node.animations[anim_idx]:
+        for channel_idx in node_state.animations[anim_idx]:
             channel = animation.channels[channel_idx]
 
             if channel.target.path == "translation":
-                BlenderBoneAnim.parse_translation_channel(gltf, node, obj, bone, channel, animation)
+                BlenderBoneAnim.parse_translation_channel(gltf, node_state, obj, bone, channel, animation)
 
             elif channel.target.path == "rotation":
-                BlenderBoneAnim.parse_rotation_channel(gltf, node, obj, bone, channel, animation)
+                BlenderBoneAnim.parse_rotation_channel(gltf, node_state, obj, bone, channel, animation)
 
             elif channel.target.path == "scale":
-                BlenderBoneAnim.parse_scale_channel(gltf, node, obj, bone, channel, animation)
+                BlenderBoneAnim.parse_scale_channel(gltf, node_state, obj, bone, channel, animation)
 
         if action.name not in gltf.current_animation_names.keys():
             gltf.current_animation_names[name] = action.name
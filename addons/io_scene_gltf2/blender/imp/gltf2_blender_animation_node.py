@@ -12,13 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
 import bpy
-from mathutils import Vector
+import numpy as np
 
 from ..com.gltf2_blender_conversion import loc_gltf_to_blender, quaternion_gltf_to_blender, scale_gltf_to_blender
 from ..com.gltf2_blender_conversion import correction_rotation
 from ...io.imp.gltf2_io_binary import BinaryData
-from .gltf2_blender_animation_utils import simulate_stash, restore_last_action
+from .gltf2_blender_animation_utils import simulate_stash, restore_last_action, set_interpolation
 
 
 class BlenderNodeAnim():
@@ -26,26 +27,12 @@ class BlenderNodeAnim():
     def __new__(cls, *args, **kwargs):
         raise RuntimeError("%s should not be instantiated" % cls)
 
-    @staticmethod
-    def set_interpolation(interpolation, kf):
-        """Manage interpolation."""
-        if interpolation == "LINEAR":
-            kf.interpolation = 'LINEAR'
-        elif interpolation == "STEP":
-            kf.interpolation = 'CONSTANT'
-        elif interpolation == "CUBICSPLINE":
-            kf.interpolation = 'BEZIER'
-            kf.handle_right_type = 'AUTO'
-            kf.handle_left_type = 'AUTO'
-        else:
-            kf.interpolation = 'LINEAR'
-
     @staticmethod
     def stash_action(gltf, anim_idx, node_idx, action_name):
-        node = gltf.data.nodes[node_idx]
-        obj = bpy.data.objects[node.blender_object]
+        node_state = gltf.node_states[node_idx]
+        obj = bpy.data.objects[node_state.blender_object]
 
-        if anim_idx not in node.animations.keys():
+        if anim_idx not in node_state.animations.keys():
             return
 
         if (obj.name, action_name) in gltf.actions_stashed.keys():
@@ -59,19 +46,19 @@ class BlenderNodeAnim():
 
     @staticmethod
     def restore_last_action(gltf, node_idx):
-        node = gltf.data.nodes[node_idx]
-        obj = bpy.data.objects[node.blender_object]
+        node_state = gltf.node_states[node_idx]
+        obj = bpy.data.objects[node_state.blender_object]
 
         restore_last_action(obj)
 
     @staticmethod
     def anim(gltf, anim_idx, node_idx):
         """Manage animation."""
-        node = gltf.data.nodes[node_idx]
-        obj = bpy.data.objects[node.blender_object]
+        node_state = gltf.node_states[node_idx]
+        obj = bpy.data.objects[node_state.blender_object]
         fps = bpy.context.scene.render.fps
 
-        if anim_idx not in node.animations.keys():
+        if anim_idx not in node_state.animations.keys():
             return
 
         animation = gltf.data.animations[anim_idx]
@@ -97,7 +84,7 @@ class BlenderNodeAnim():
             obj.animation_data_create()
         obj.animation_data.action = bpy.data.actions[action.name]
 
-        for channel_idx in node.animations[anim_idx]:
+        for channel_idx in node_state.animations[anim_idx]:
             channel = animation.channels[channel_idx]
 
             keys = BinaryData.get_data_from_accessor(gltf, animation.samplers[channel.sampler].input)
@@ -123,7 +110,7 @@ class BlenderNodeAnim():
                     blender_path = "rotation_quaternion"
                     group_name = "Rotation"
                     num_components = 4
-                    if node.correction_needed is True:
+                    if node_state.correction_needed is True:
                         if bpy.app.version < (2, 80, 0):
                             values = [
                                 (quaternion_gltf_to_blender(vals).to_matrix().to_4x4() * correction_rotation()).to_quaternion()
@@ -165,35 +152,103 @@ class BlenderNodeAnim():
                     fcurve.keyframe_points.foreach_set('co', coords)
 
                     # Setting interpolation
-                    for kf in fcurve.keyframe_points:
-                        BlenderNodeAnim.set_interpolation(animation.samplers[channel.sampler].interpolation, kf)
+                    set_interpolation(fcurve.keyframe_points, animation.samplers[channel.sampler].interpolation)
                     fcurve.update() # force updating tangents (this may change when tangent will be managed)
 
             elif channel.target.path == 'weights':
-
-                # retrieve number of targets
-                nb_targets = 0
-                for prim in gltf.data.meshes[gltf.data.nodes[node_idx].mesh].primitives:
-                    if prim.targets:
-                        if len(prim.targets) > nb_targets:
-                            nb_targets = len(prim.targets)
-
-                if animation.samplers[channel.sampler].interpolation == "CUBICSPLINE":
-                    factor = 3
-                    delta = nb_targets
-                else:
-                    factor = 1
-                    delta = 0
-
-                for idx, key in enumerate(keys):
-                    for sk in range(nb_targets):
-                        if gltf.shapekeys[sk] is not None: # Do not animate shapekeys not created
-                            obj.data.shape_keys.key_blocks[gltf.shapekeys[sk]].value = values[factor * idx * nb_targets + delta + sk][0]
-                            obj.data.shape_keys.key_blocks[gltf.shapekeys[sk]].keyframe_insert(
-                                "value",
-                                frame=key[0] * fps,
-                                group='ShapeKeys'
-                            )
+                BlenderNodeAnim.parse_weights_channel(gltf, node_idx, obj, channel, animation)
 
         if action.name not in gltf.current_animation_names.keys():
             gltf.current_animation_names[name] = action.name
+
+    @staticmethod
+    def parse_weights_channel(gltf, node_idx, obj, channel, animation):
+        """Manage morph weights animation, on shape keys of object mesh."""
+        fps = bpy.context.scene.render.fps
+        shape_keys = obj.data.shape_keys
+
+        # retrieve number of targets
+        nb_targets = 0
+        for prim in gltf.data.meshes[gltf.data.nodes[node_idx].mesh].primitives:
+            if prim.targets:
+                if len(prim.targets) > nb_targets:
+                    nb_targets = len(prim.targets)
+
+        keys = BinaryData.decode_accessor(gltf, animation.samplers[channel.sampler].input)[:, 0]
+        values = BinaryData.decode_accessor(gltf, animation.samplers[channel.sampler].output)
+
+        interpolation = animation.samplers[channel.sampler].interpolation
+
+        # One row of weights per key
+        nb_values_per_key = nb_targets * (3 if interpolation == "CUBICSPLINE" else 1)
+        if values.size != len(keys) * nb_values_per_key:
+            gltf.log.error("Weights animation of node " + str(node_idx) + " has " + str(values.size) +
+                           " values, " + str(len(keys) * nb_values_per_key) + " expected. Channel skipped")
+            return
+        if interpolation == "CUBICSPLINE":
+            # TODO manage tangent?
+            values = values.reshape(len(keys), 3, nb_targets)[:, 1, :]
+        else:
+            values = values.reshape(len(keys), nb_targets)
+
+        # All weight animations of the mesh go in the same action, as keyframe_insert would do
+        if not shape_keys.animation_data:
+            shape_keys.animation_data_create()
+        if shape_keys.animation_data.action is None:
+            shape_keys.animation_data.action = bpy.data.actions.new(shape_keys.name + "Action")
+        action = shape_keys.animation_data.action
+
+        if 'ShapeKeys' not in action.groups:
+            action.groups.new('ShapeKeys')
+        group = action.groups['ShapeKeys']
+
+        coords = np.empty((len(keys), 2), dtype=np.float32)
+        coords[:, 0] = keys * fps
+
+        for sk in range(nb_targets):
+            if gltf.shapekeys[sk] is None: # Do not animate shapekeys not created
+                continue
+
+            coords[:, 1] = values[:, sk]
+
+            # Path by name, as keyframe_insert would create (gltf.shapekeys stores key block indices)
+            key_block_name = shape_keys.key_blocks[gltf.shapekeys[sk]].name
+            blender_path = 'key_blocks[' + json.dumps(key_block_name, ensure_ascii=False) + '].value'
+            fcurve = action.fcurves.find(blender_path)
+            if fcurve is None:
+                fcurve = action.fcurves.new(data_path=blender_path)
+                fcurve.group = group
+                fcurve_coords = coords
+                previous_settings = []
+                previous_positions = []
+                new_positions = range(len(coords))
+            else:
+                # Merge with keys of a previous animation, keys of this animation replace the ones on same frames
+                previous_coords = np.empty(2 * len(fcurve.keyframe_points), dtype=np.float32)
+                fcurve.keyframe_points.foreach_get('co', previous_coords)
+                previous_coords = previous_coords.reshape(-1, 2)
+                kept = ~np.isin(previous_coords[:, 0], coords[:, 0])
+                # Kept keys move when keyframes are sorted, their interpolation is restored after
+                previous_settings = [
+                    (kf.interpolation, kf.handle_left_type, kf.handle_right_type)
+                    for kf, keep in zip(fcurve.keyframe_points, kept) if keep
+                ]
+                fcurve_coords = np.concatenate((previous_coords[kept], coords))
+                order = np.argsort(fcurve_coords[:, 0], kind='stable')
+                fcurve_coords = fcurve_coords[order]
+                positions = np.empty(len(order), dtype=np.int64)
+                positions[order] = np.arange(len(order))
+                new_positions = positions[len(previous_settings):]
+                previous_positions = positions[:len(previous_settings)]
+
+            fcurve.keyframe_points.add(len(fcurve_coords) - len(fcurve.keyframe_points))
+            fcurve.keyframe_points.foreach_set('co', fcurve_coords.reshape(-1))
+
+            # Setting interpolation, only on keys of this animation
+            for pos, (previous_interpolation, left_type, right_type) in zip(previous_positions, previous_settings):
+                kf = fcurve.keyframe_points[int(pos)]
+                kf.interpolation = previous_interpolation
+                kf.handle_left_type = left_type
+                kf.handle_right_type = right_type
+            set_interpolation([fcurve.keyframe_points[int(pos)] for pos in new_positions], interpolation)
+            fcurve.update() # force updating tangents (this may change when tangent will be managed)
@@ -36,3 +36,22 @@ def restore_last_action(obj):
     if len(tracks[0].strips) == 0:
         return
     obj.animation_data.action = tracks[0].strips[0].action
+
+def set_interpolation(keyframe_points, interpolation):
+    """Set interpolation of all keyframes, from glTF interpolation.
+
+    foreach_set can't set enum properties, keyframes are set in a single loop per F-Curve.
+    """
+    if interpolation == "STEP":
+        blender_interpolation = 'CONSTANT'
+    elif interpolation == "CUBICSPLINE":
+        blender_interpolation = 'BEZIER'
+    else:
+        blender_interpolation = 'LINEAR'
+
+    for kf in keyframe_points:
+        kf.interpolation = blender_interpolation
+    if interpolation == "CUBICSPLINE":
+        for kf in keyframe_points:
+            kf.handle_right_type = 'AUTO'
+            kf.handle_left_type = 'AUTO'
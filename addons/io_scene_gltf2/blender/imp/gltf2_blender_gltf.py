@@ -13,8 +13,11 @@
 # limitations under the License.
 
 import bpy
+import numpy as np
 from .gltf2_blender_scene import BlenderScene
-from ...io.com.gltf2_io_trs import TRS
+from .gltf2_blender_image import BlenderImage
+from .gltf2_blender_import_state import NodeState, SkinState, MeshState, MaterialState, ImageState
+from ...io.com.gltf2_io_trs_batch import BatchTRS
 
 
 class BlenderGlTF():
@@ -31,6 +34,7 @@ class BlenderGlTF():
             if bpy.context.scene.render.engine not in ['CYCLES', 'BLENDER_EEVEE']:
                 bpy.context.scene.render.engine = 'BLENDER_EEVEE'
         BlenderGlTF.pre_compute(gltf)
+        BlenderImage.index_images(gltf)
 
         gltf.display_current_node = 0
         if gltf.data.nodes is not None:
@@ -39,7 +43,14 @@ class BlenderGlTF():
             gltf.display_total_nodes = "?"
 
         active_object_name_at_end = None
-        if gltf.data.scenes is not None:
+        if gltf.selected_roots is not None:
+            # Partial import: only selected nodes, in selected scene
+            BlenderScene.create(gltf, gltf.selected_scene, gltf.selected_roots)
+            if bpy.app.version < (2, 80, 0):
+                active_object_name_at_end = bpy.context.scene.objects.active.name
+            else:
+                active_object_name_at_end = bpy.context.view_layer.objects.active.name
+        elif gltf.data.scenes is not None:
             for scene_idx, scene in enumerate(gltf.data.scenes):
                 BlenderScene.create(gltf, scene_idx)
             # keep active object name if needed (to be able to set as active object at end)
@@ -64,55 +75,6 @@ class BlenderGlTF():
             else:
                 active_object_name_at_end = bpy.context.view_layer.objects.active.name
 
-        # Armature correction
-        # Try to detect bone chains, and set bone lengths
-        # To detect if a bone is in a chain, we try to detect if a bone head is aligned
-        # with parent_bone :
-        #          Parent bone defined a line (between head & tail)
-        #          Bone head defined a point
-        #          Calcul of distance between point and line
-        #          If < threshold --> In a chain
-        # Based on an idea of @Menithal, but added alignement detection to avoid some bad cases
-
-        threshold = 0.001
-        for armobj in [obj for obj in bpy.data.objects if obj.type == "ARMATURE"]:
-            if bpy.app.version < (2, 80, 0):
-                # Take into account only armature from this scene
-                if armobj.name not in bpy.context.scene.objects:
-                    continue
-                bpy.context.scene.objects.active = armobj
-            else:
-                # Take into account only armature from this scene
-                if armobj.name not in bpy.context.view_layer.objects:
-                    continue
-                bpy.context.view_layer.objects.active = armobj
-            armature = armobj.data
-            bpy.ops.object.mode_set(mode="EDIT")
-            for bone in armature.edit_bones:
-                if bone.parent is None:
-                    continue
-
-                parent = bone.parent
-
-                # case where 2 bones are aligned (not in chain, same head)
-                if (bone.head - parent.head).length < threshold:
-                    continue
-
-                u = (parent.tail - parent.head).normalized()
-                point = bone.head
-                distance = ((point - parent.head).cross(u)).length / u.length
-                if distance < threshold:
-                    save_parent_direction = (parent.tail - parent.head).normalized().copy()
-                    save_parent_tail = parent.tail.copy()
-                    parent.tail = bone.head
-
-                    # case where 2 bones are aligned (not in chain, same head)
-                    # bone is no more is same direction
-                    if (parent.tail - parent.head).normalized().dot(save_parent_direction) < 0.9:
-                        parent.tail = save_parent_tail
-
-            bpy.ops.object.mode_set(mode="OBJECT")
-
         # Set active object
         if active_object_name_at_end is not None:
             if bpy.app.version < (2, 80, 0):
@@ -135,40 +97,41 @@ class BlenderGlTF():
         gltf.shapekeys = {}
 
         # Blender material
+        gltf.material_states = [MaterialState() for _ in range(len(gltf.data.materials or []))]
         if gltf.data.materials:
-            for material in gltf.data.materials:
-                material.blender_material = {}
+            for material_idx, material in enumerate(gltf.data.materials):
+                material_state = gltf.material_states[material_idx]
 
                 if material.pbr_metallic_roughness:
                     # Init
-                    material.pbr_metallic_roughness.color_type = gltf.SIMPLE
-                    material.pbr_metallic_roughness.vertex_color = False
-                    material.pbr_metallic_roughness.metallic_type = gltf.SIMPLE
+                    material_state.color_type = gltf.SIMPLE
+                    material_state.vertex_color = False
+                    material_state.metallic_type = gltf.SIMPLE
 
                     if material.pbr_metallic_roughness.base_color_texture:
-                        material.pbr_metallic_roughness.color_type = gltf.TEXTURE
+                        material_state.color_type = gltf.TEXTURE
 
                     if material.pbr_metallic_roughness.metallic_roughness_texture:
-                        material.pbr_metallic_roughness.metallic_type = gltf.TEXTURE
+                        material_state.metallic_type = gltf.TEXTURE
 
                     if material.pbr_metallic_roughness.base_color_factor:
-                        if material.pbr_metallic_roughness.color_type == gltf.TEXTURE and \
+                        if material_state.color_type == gltf.TEXTURE and \
                                 material.pbr_metallic_roughness.base_color_factor != [1.0, 1.0, 1.0, 1.0]:
-                            material.pbr_metallic_roughness.color_type = gltf.TEXTURE_FACTOR
+                            material_state.color_type = gltf.TEXTURE_FACTOR
                     else:
                         material.pbr_metallic_roughness.base_color_factor = [1.0, 1.0, 1.0, 1.0]
 
                     if material.pbr_metallic_roughness.metallic_factor is not None:
-                        if material.pbr_metallic_roughness.metallic_type == gltf.TEXTURE \
+                        if material_state.metallic_type == gltf.TEXTURE \
                                 and material.pbr_metallic_roughness.metallic_factor != 1.0:
-                            material.pbr_metallic_roughness.metallic_type = gltf.TEXTURE_FACTOR
+                            material_state.metallic_type = gltf.TEXTURE_FACTOR
                     else:
                         material.pbr_metallic_roughness.metallic_factor = 1.0
 
                     if material.pbr_metallic_roughness.roughness_factor is not None:
-                        if material.pbr_metallic_roughness.metallic_type == gltf.TEXTURE \
+                        if material_state.metallic_type == gltf.TEXTURE \
                                 and material.pbr_metallic_roughness.roughness_factor != 1.0:
-                            material.pbr_metallic_roughness.metallic_type = gltf.TEXTURE_FACTOR
+                            material_state.metallic_type = gltf.TEXTURE_FACTOR
                     else:
                         material.pbr_metallic_roughness.roughness_factor = 1.0
 
@@ -210,87 +173,70 @@ class BlenderGlTF():
                         material.extensions['KHR_materials_pbrSpecularGlossiness']['glossinessFactor'] = 1.0
 
         # images
-        if gltf.data.images is not None:
-            for img in gltf.data.images:
-                img.blender_image_name = None
+        gltf.image_states = [ImageState() for _ in range(len(gltf.data.images or []))]
+
+        # Meshes
+        gltf.mesh_states = [MeshState(len(mesh.primitives)) for mesh in gltf.data.meshes or []]
+
+        gltf.skin_states = [SkinState() for _ in range(len(gltf.data.skins or []))]
+
+        gltf.node_states = [NodeState() for _ in range(len(gltf.data.nodes or []))]
 
         if gltf.data.nodes is None:
             # Something is wrong in file, there is no nodes
             return
 
-        for node_idx, node in enumerate(gltf.data.nodes):
-
-            # Weight animation management
-            node.weight_animation = False
+        BlenderGlTF.compute_indexes(gltf)
 
+        for node_idx, node in enumerate(gltf.data.nodes):
             # skin management
             if node.skin is not None and node.mesh is not None:
-                if not hasattr(gltf.data.skins[node.skin], "node_ids"):
-                    gltf.data.skins[node.skin].node_ids = []
-
-                gltf.data.skins[node.skin].node_ids.append(node_idx)
-
-            # Lights management
-            node.correction_needed = False
+                if gltf.selected_nodes is None or node_idx in gltf.selected_nodes:
+                    gltf.skin_states[node.skin].node_ids.append(node_idx)
 
-            # transform management
-            if node.matrix:
-                node.transform = node.matrix
-                continue
+        # transform management, for all nodes at once
+        gltf.node_matrices = BatchTRS.local_matrices(gltf.data.nodes)
+        parents = np.array([gltf.node_parents.get(node_idx, -1) for node_idx in range(len(gltf.data.nodes))])
+        gltf.node_world_matrices = BatchTRS.world_matrices(gltf.node_matrices, parents)
 
-            # No matrix, but TRS
-            mat = [1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0]  # init
-
-            if node.scale:
-                mat = TRS.scale_to_matrix(node.scale)
-
-            if node.rotation:
-                q_mat = TRS.quaternion_to_matrix(node.rotation)
-                mat = TRS.matrix_multiply(q_mat, mat)
-
-            if node.translation:
-                loc_mat = TRS.translation_to_matrix(node.translation)
-                mat = TRS.matrix_multiply(loc_mat, mat)
-
-            node.transform = mat
+        # joint management
+        for node_idx, (skin_idx, _) in gltf.joint_skins.items():
+            gltf.node_states[node_idx].is_joint = True
+            gltf.node_states[node_idx].skin_id = skin_idx
+        # if skin.skeleton and skin.skeleton not in skin.joints:
+        #     gltf.node_states[skin.skeleton].is_joint = True
+        #     gltf.node_states[skin.skeleton].skin_id  = skin_id
 
+        # Dispatch animation
+        if gltf.data.animations:
+            for node_idx, animations in gltf.node_animations.items():
+                gltf.node_states[node_idx].animations = animations
+                # Manage node with animation on weights, that are animated in meshes in Blender (ShapeKeys)
+                for anim_idx, channel_idxs in animations.items():
+                    for channel_idx in channel_idxs:
+                        if gltf.data.animations[anim_idx].channels[channel_idx].target.path == "weights":
+                            gltf.node_states[node_idx].weight_animation = True
 
-        # joint management
-        for node_idx, node in enumerate(gltf.data.nodes):
-            is_joint, skin_idx = gltf.is_node_joint(node_idx)
-            if is_joint:
-                node.is_joint = True
-                node.skin_id = skin_idx
-            else:
-                node.is_joint = False
+    @staticmethod
+    def compute_indexes(gltf):
+        """Build scene graph indexes once, to avoid scanning nodes, skins and animations during creation."""
+        # node -> parent node
+        gltf.compute_node_parents()
 
+        # node -> (skin, index of joint in skin). A joint used by multiple skins belongs to its first skin
+        gltf.joint_skins = {}
         if gltf.data.skins:
-            for skin_id, skin in enumerate(gltf.data.skins):
-                # init blender values
-                skin.blender_armature_name = None
-                # if skin.skeleton and skin.skeleton not in skin.joints:
-                #     gltf.data.nodes[skin.skeleton].is_joint = True
-                #     gltf.data.nodes[skin.skeleton].skin_id  = skin_id
+            for skin_idx, skin in enumerate(gltf.data.skins):
+                for joint_idx, node_idx in enumerate(skin.joints):
+                    if node_idx not in gltf.joint_skins.keys():
+                        gltf.joint_skins[node_idx] = (skin_idx, joint_idx)
 
-        # Dispatch animation
+        # node -> {animation: [channels]}
+        gltf.node_animations = {}
         if gltf.data.animations:
-            for node_idx, node in enumerate(gltf.data.nodes):
-                node.animations = {}
-
             for anim_idx, anim in enumerate(gltf.data.animations):
                 for channel_idx, channel in enumerate(anim.channels):
                     if channel.target.node is None:
                         continue
-
-                    if anim_idx not in gltf.data.nodes[channel.target.node].animations.keys():
-                        gltf.data.nodes[channel.target.node].animations[anim_idx] = []
-                    gltf.data.nodes[channel.target.node].animations[anim_idx].append(channel_idx)
-                    # Manage node with animation on weights, that are animated in meshes in Blender (ShapeKeys)
-                    if channel.target.path == "weights":
-                        gltf.data.nodes[channel.target.node].weight_animation = True
-
-        # Meshes
-        if gltf.data.meshes:
-            for mesh in gltf.data.meshes:
-                mesh.blender_name = None
-                mesh.is_weight_animated = False
+                    animations = gltf.node_animations.setdefault(channel.target.node, {})
+                    animations.setdefault(anim_idx, []).append(channel_idx)
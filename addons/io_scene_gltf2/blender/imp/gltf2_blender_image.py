@@ -15,7 +15,8 @@
 import bpy
 import os
 import tempfile
-from os.path import dirname, join, isfile, basename
+import hashlib
+from os.path import dirname, join, isfile, basename, abspath, normpath, normcase
 
 from ...io.imp.gltf2_io_binary import BinaryData
 
@@ -51,15 +52,68 @@ class BlenderImage():
 
         return False, None, None
 
+    @staticmethod
+    def normalize_path(path):
+        """Normalized absolute path, to compare image paths."""
+        return normcase(normpath(abspath(path)))
+
+    @staticmethod
+    def index_images(gltf):
+        """Index existing Blender images, by path and by glTF image they were created from.
+
+        Images packed by a previous import of the same file are identified by (import id, glTF image index).
+        """
+        gltf.image_import_id = BlenderImage.normalize_path(gltf.filename)
+        gltf.blender_images_by_path = {}
+        gltf.blender_images_by_gltf_index = {}
+        gltf.blender_images_by_hash = {}
+        # Number of glTF images that reused a Blender image with the same content
+        gltf.image_dedup_count = 0
+        for blender_image in bpy.data.images:
+            BlenderImage.index_image(gltf, blender_image)
+
+    @staticmethod
+    def index_image(gltf, blender_image):
+        """Add image to indexes. First indexed image wins, as first one was found when scanning images."""
+        if blender_image.filepath:
+            path = BlenderImage.normalize_path(bpy.path.abspath(blender_image.filepath, library=blender_image.library))
+            gltf.blender_images_by_path.setdefault(path, blender_image.name)
+        if 'gltf_import_id' in blender_image.keys() and 'gltf_index' in blender_image.keys():
+            key = (blender_image['gltf_import_id'], blender_image['gltf_index'])
+            gltf.blender_images_by_gltf_index.setdefault(key, blender_image.name)
+        if 'gltf_content_hash' in blender_image.keys():
+            gltf.blender_images_by_hash.setdefault(blender_image['gltf_content_hash'], blender_image.name)
+
+    @staticmethod
+    def content_hash(img_data):
+        """Hash of image file content, to share images with same content."""
+        return hashlib.blake2b(img_data, digest_size=16).hexdigest()
+
+    @staticmethod
+    def get_same_content_image(gltf, content_hash):
+        """Image with same content, already imported, if any."""
+        img_ = BlenderImage.get_indexed_image(gltf.blender_images_by_hash, content_hash)
+        if img_ is not None:
+            gltf.image_dedup_count += 1
+        return img_
+
+    @staticmethod
+    def get_indexed_image(index, key):
+        """Image found in index, if still existing."""
+        name = index.get(key)
+        if name is None:
+            return None
+        return bpy.data.images.get(name)
+
     @staticmethod
     def create(gltf, img_idx, tex_index, tex_transform):
         """Image creation."""
-        img = gltf.data.images[img_idx]
+        img_state = gltf.image_states[img_idx]
 
-        if img.blender_image_name is not None:
+        if img_state.blender_image_name is not None:
             # Image is already used somewhere
             # We need to store index, for texture coord. mapping, if needed
-            bpy.data.images[img.blender_image_name]['tex_transform'][str(tex_index)] = tex_transform
+            bpy.data.images[img_state.blender_image_name]['tex_transform'][str(tex_index)] = tex_transform
             return
 
         if gltf.import_settings['import_pack_images'] is False:
@@ -70,42 +124,75 @@ class BlenderImage():
             if real is True:
 
                 # Check if image is already loaded
-                for img_ in bpy.data.images:
-                    if img_.filepath == path:
-                        # Already loaded, not needed to reload it
-                        img.blender_image_name = img_.name
-                        img_['tex_transform'][str(tex_index)] = tex_transform
-                        return
+                img_ = BlenderImage.get_indexed_image(gltf.blender_images_by_path, BlenderImage.normalize_path(path))
+                if img_ is not None:
+                    # Already loaded, not needed to reload it
+                    img_state.blender_image_name = img_.name
+                    img_['tex_transform'][str(tex_index)] = tex_transform
+                    return
+
+                # Check if an image with same content is already loaded (same file with another path)
+                content_hash = BlenderImage.content_hash(gltf.load_image_file(img_idx, path))
+                img_ = BlenderImage.get_same_content_image(gltf, content_hash)
+                if img_ is not None:
+                    img_state.blender_image_name = img_.name
+                    img_['tex_transform'][str(tex_index)] = tex_transform
+                    return
 
                 blender_image = bpy.data.images.load(path)
                 blender_image.name = img_name
                 blender_image['tex_transform'] = {}
                 blender_image['tex_transform'][str(tex_index)] = tex_transform
-                img.blender_image_name = blender_image.name
+                img_state.blender_image_name = blender_image.name
+                blender_image['gltf_content_hash'] = content_hash
+                BlenderImage.index_image(gltf, blender_image)
                 return
 
         # Check if the file is already loaded (packed file)
         file_creation_needed = True
-        for img_ in bpy.data.images:
-            if hasattr(img_, "gltf_index") and img_['gltf_index'] == img_idx:
-                file_creation_needed = False
-                img.blender_image_name = img_.name
-                img_['tex_transform'][tex_index] = tex_transform
-                break
+        img_ = BlenderImage.get_indexed_image(gltf.blender_images_by_gltf_index, (gltf.image_import_id, img_idx))
+        if img_ is not None:
+            file_creation_needed = False
+            img_state.blender_image_name = img_.name
+            img_['tex_transform'][str(tex_index)] = tex_transform
 
         if file_creation_needed is True:
-            # Create a temp image, pack, and delete image
-            tmp_image = tempfile.NamedTemporaryFile(delete=False)
             img_data, img_name = BinaryData.get_image_data(gltf, img_idx)
             if img_name is not None:
-                tmp_image.write(img_data)
-                tmp_image.close()
-
-                blender_image = bpy.data.images.load(tmp_image.name)
-                blender_image.pack()
-                blender_image.name = img_name
+                # Check if an image with same content is already loaded (same image embedded several times)
+                content_hash = BlenderImage.content_hash(img_data)
+                img_ = BlenderImage.get_same_content_image(gltf, content_hash)
+                if img_ is not None:
+                    img_state.blender_image_name = img_.name
+                    img_['tex_transform'][str(tex_index)] = tex_transform
+                    return
+
+                blender_image = BlenderImage.create_packed_image(img_data, img_name)
                 blender_image['tex_transform'] = {}
                 blender_image['tex_transform'][str(tex_index)] = tex_transform
-                img.blender_image_name = blender_image.name
+                img_state.blender_image_name = blender_image.name
+                blender_image['gltf_import_id'] = gltf.image_import_id
                 blender_image['gltf_index'] = img_idx
-                os.remove(tmp_image.name)
+                blender_image['gltf_content_hash'] = content_hash
+                BlenderImage.index_image(gltf, blender_image)
+
+    @staticmethod
+    def create_packed_image(img_data, img_name):
+        """Create a packed image from encoded image data (PNG, JPEG) in memory."""
+        if bpy.app.version < (2, 80, 0):
+            # Image can't be packed from memory, create a temp image, pack, and delete image
+            tmp_image = tempfile.NamedTemporaryFile(delete=False)
+            tmp_image.write(img_data)
+            tmp_image.close()
+
+            blender_image = bpy.data.images.load(tmp_image.name)
+            blender_image.pack()
+            os.remove(tmp_image.name)
+        else:
+            # Pack data, then read image from packed file, without writing it on disk
+            blender_image = bpy.data.images.new(img_name, 8, 8)
+            blender_image.pack(data=bytes(img_data), data_len=len(img_data))
+            blender_image.source = 'FILE'
+
+        blender_image.name = img_name
+        return blender_image
@@ -0,0 +1,86 @@
+# Copyright 2019 The glTF-Blender-IO authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Import runtime data of glTF objects.
+# gltf2_io classes only hold glTF data, import data is stored in side tables of the importer,
+# indexed as glTF objects are: gltf.node_states[node_idx], gltf.mesh_states[mesh_idx].primitives[prim_idx]...
+
+
+class NodeState:
+    """Import data of a node."""
+    __slots__ = ('blender_object', 'parent', 'is_joint', 'skin_id', 'blender_armature_name', 'blender_bone_name',
+                 'blender_bone_matrix', 'blender_bone_pose_matrix', 'correction_needed', 'weight_animation',
+                 'animations')
+
+    def __init__(self):
+        self.blender_object = ""
+        self.parent = None
+        self.is_joint = False
+        self.skin_id = None
+        self.blender_armature_name = None
+        self.blender_bone_name = None
+        self.blender_bone_matrix = None
+        self.blender_bone_pose_matrix = None
+        self.correction_needed = False
+        self.weight_animation = False
+        self.animations = {}
+
+
+class SkinState:
+    """Import data of a skin."""
+    __slots__ = ('blender_armature_name', 'node_ids')
+
+    def __init__(self):
+        self.blender_armature_name = None
+        self.node_ids = []
+
+
+class MeshState:
+    """Import data of a mesh."""
+    __slots__ = ('blender_name', 'is_weight_animated', 'primitives')
+
+    def __init__(self, nb_primitives):
+        self.blender_name = None
+        self.is_weight_animated = False
+        self.primitives = [PrimitiveState() for _ in range(nb_primitives)]
+
+
+class PrimitiveState:
+    """Import data of a mesh primitive."""
+    __slots__ = ('vertex_remap', 'vertices_length', 'faces_length', 'blender_texcoord')
+
+    def __init__(self):
+        self.vertex_remap = None
+        self.vertices_length = 0
+        self.faces_length = 0
+        self.blender_texcoord = {}
+
+
+class MaterialState:
+    """Import data of a material. Types are the ones of its pbrMetallicRoughness."""
+    __slots__ = ('blender_material', 'color_type', 'metallic_type', 'vertex_color')
+
+    def __init__(self):
+        self.blender_material = {}
+        self.color_type = None
+        self.metallic_type = None
+        self.vertex_color = False
+
+
+class ImageState:
+    """Import data of an image."""
+    __slots__ = ('blender_image_name',)
+
+    def __init__(self):
+        self.blender_image_name = None
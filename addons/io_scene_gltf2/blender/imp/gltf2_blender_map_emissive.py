@@ -33,7 +33,7 @@ class BlenderEmissiveMap():
         """Create node tree."""
         pymaterial = gltf.data.materials[material_idx]
 
-        material = bpy.data.materials[pymaterial.blender_material[vertex_color]]
+        material = bpy.data.materials[gltf.material_states[material_idx].blender_material[vertex_color]]
         node_tree = material.node_tree
 
         if factor_only is False:
@@ -74,10 +74,10 @@ class BlenderEmissiveMap():
                 uvmap["gltf2_texcoord"] = 0  # TODO: set in precompute instead of here?
 
             text = node_tree.nodes.new('ShaderNodeTexImage')
-            if gltf.data.images[
+            if gltf.image_states[
                 gltf.data.textures[pymaterial.emissive_texture.index].source
             ].blender_image_name is not None:
-                text.image = bpy.data.images[gltf.data.images[
+                text.image = bpy.data.images[gltf.image_states[
                     gltf.data.textures[pymaterial.emissive_texture.index].source
                 ].blender_image_name]
             text.label = 'EMISSIVE'
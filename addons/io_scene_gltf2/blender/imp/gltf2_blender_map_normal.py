@@ -32,7 +32,7 @@ class BlenderNormalMap():
         """Creation of Nodetree."""
         pymaterial = gltf.data.materials[material_idx]
 
-        material = bpy.data.materials[pymaterial.blender_material[vertex_color]]
+        material = bpy.data.materials[gltf.material_states[material_idx].blender_material[vertex_color]]
         node_tree = material.node_tree
 
         BlenderTextureInfo.create(gltf, pymaterial.normal_texture)
@@ -59,10 +59,10 @@ class BlenderNormalMap():
             uvmap["gltf2_texcoord"] = 0  # TODO set in pre_compute instead of here
 
         text = node_tree.nodes.new('ShaderNodeTexImage')
-        if gltf.data.images[
+        if gltf.image_states[
             gltf.data.textures[pymaterial.normal_texture.index].source
         ].blender_image_name is not None:
-            text.image = bpy.data.images[gltf.data.images[
+            text.image = bpy.data.images[gltf.image_states[
                 gltf.data.textures[pymaterial.normal_texture.index].source
             ].blender_image_name]
         text.label = 'NORMALMAP'
@@ -33,16 +33,16 @@ class BlenderOcclusionMap():
         """Nodetree creation."""
         pymaterial = gltf.data.materials[material_idx]
 
-        material = bpy.data.materials[pymaterial.blender_material[vertex_color]]
+        material = bpy.data.materials[gltf.material_states[material_idx].blender_material[vertex_color]]
         node_tree = material.node_tree
 
         BlenderTextureInfo.create(gltf, pymaterial.occlusion_texture)
 
         # Pack texture. Occlusion is calculated from Cycles or Eevee, so do nothing
-        if gltf.data.images[gltf.data.textures[
+        if gltf.image_states[gltf.data.textures[
             pymaterial.occlusion_texture.index
         ].source].blender_image_name is not None:
-            bpy.data.images[gltf.data.images[gltf.data.textures[
+            bpy.data.images[gltf.image_states[gltf.data.textures[
                 pymaterial.occlusion_texture.index
             ].source].blender_image_name].use_fake_user = True
 
@@ -66,7 +66,7 @@ class BlenderOcclusionMap():
         # Check if the texture node already exists (if used by other parameter metal / roughness)
         found = False
         for node in [node for node in node_tree.nodes if node.type == "TEX_IMAGE"]:
-            if gltf.data.images[gltf.data.textures[
+            if gltf.image_states[gltf.data.textures[
                 pymaterial.occlusion_texture.index
             ].source].blender_image_name == node.image.name:
                 # This is our image !
@@ -92,10 +92,10 @@ class BlenderOcclusionMap():
                 uvmap["gltf2_texcoord"] = 0  # TODO set in pre_compute instead of here
 
             text = node_tree.nodes.new('ShaderNodeTexImage')
-            if gltf.data.images[
+            if gltf.image_states[
                 gltf.data.textures[pymaterial.occlusion_texture.index].source
             ].blender_image_name is not None:
-                text.image = bpy.data.images[gltf.data.images[
+                text.image = bpy.data.images[gltf.image_states[
                     gltf.data.textures[pymaterial.occlusion_texture.index].source
                 ].blender_image_name]
             text.label = 'OCCLUSION'
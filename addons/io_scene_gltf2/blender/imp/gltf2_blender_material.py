@@ -34,6 +34,7 @@ class BlenderMaterial():
     def create(gltf, material_idx, vertex_color):
         """Material creation."""
         pymaterial = gltf.data.materials[material_idx]
+        material_state = gltf.material_states[material_idx]
 
         if vertex_color is None:
             if pymaterial.name is not None:
@@ -47,7 +48,7 @@ class BlenderMaterial():
                 name = "Material_" + str(material_idx) + "_" + vertex_color
 
         mat = bpy.data.materials.new(name)
-        pymaterial.blender_material[vertex_color] = mat.name
+        material_state.blender_material[vertex_color] = mat.name
 
         if bpy.app.version < (2, 80, 0):
             pass # Blender 2.79 did not have a per-material double-sided flag.
@@ -78,10 +79,10 @@ class BlenderMaterial():
                 pbr["metallicFactor"] = 1.0
                 pbr["roughnessFactor"] = 1.0
                 pymaterial.pbr_metallic_roughness = MaterialPBRMetallicRoughness.from_dict(pbr)
-                pymaterial.pbr_metallic_roughness.color_type = gltf.SIMPLE
-                pymaterial.pbr_metallic_roughness.metallic_type = gltf.SIMPLE
+                material_state.color_type = gltf.SIMPLE
+                material_state.metallic_type = gltf.SIMPLE
 
-            BlenderPbr.create(gltf, pymaterial.pbr_metallic_roughness, mat.name, vertex_color)
+            BlenderPbr.create(gltf, pymaterial.pbr_metallic_roughness, material_state, mat.name, vertex_color)
 
         if ignore_map == False:
             # add emission map if needed
@@ -105,21 +106,21 @@ class BlenderMaterial():
             BlenderMaterial.blender_alpha(gltf, material_idx, vertex_color, pymaterial.alpha_mode)
 
     @staticmethod
-    def set_uvmap(gltf, material_idx, prim, obj, vertex_color):
+    def set_uvmap(gltf, material_idx, prim_state, obj, vertex_color):
         """Set UV Map."""
-        pymaterial = gltf.data.materials[material_idx]
+        material_state = gltf.material_states[material_idx]
 
-        node_tree = bpy.data.materials[pymaterial.blender_material[vertex_color]].node_tree
+        node_tree = bpy.data.materials[material_state.blender_material[vertex_color]].node_tree
         uvmap_nodes = [node for node in node_tree.nodes if node.type in ['UVMAP', 'NORMAL_MAP']]
         for uvmap_node in uvmap_nodes:
-            if uvmap_node["gltf2_texcoord"] in prim.blender_texcoord.keys():
-                uvmap_node.uv_map = prim.blender_texcoord[uvmap_node["gltf2_texcoord"]]
+            if uvmap_node["gltf2_texcoord"] in prim_state.blender_texcoord.keys():
+                uvmap_node.uv_map = prim_state.blender_texcoord[uvmap_node["gltf2_texcoord"]]
 
     @staticmethod
     def blender_alpha(gltf, material_idx, vertex_color, alpha_mode):
         """Set alpha."""
         pymaterial = gltf.data.materials[material_idx]
-        material = bpy.data.materials[pymaterial.blender_material[vertex_color]]
+        material = bpy.data.materials[gltf.material_states[material_idx].blender_material[vertex_color]]
 
         # Set alpha value in material
         if bpy.app.version < (2, 80, 0):
@@ -14,10 +14,11 @@
 
 import bpy
 import bmesh
+import numpy as np
 
 from .gltf2_blender_primitive import BlenderPrimitive
 from ...io.imp.gltf2_io_binary import BinaryData
-from ...io.com.gltf2_io_color_management import color_linear_to_srgb
+from ...io.com.gltf2_io_color_management import color_linear_to_srgb_array
 from ..com.gltf2_blender_conversion import loc_gltf_to_blender
 
 
@@ -30,6 +31,7 @@ class BlenderMesh():
     def create(gltf, mesh_idx, node_idx, parent):
         """Mesh creation."""
         pymesh = gltf.data.meshes[mesh_idx]
+        mesh_state = gltf.mesh_states[mesh_idx]
 
         # Geometry
         if pymesh.name:
@@ -39,37 +41,173 @@ class BlenderMesh():
 
         mesh = bpy.data.meshes.new(mesh_name)
         verts = []
-        edges = []
         faces = []
-        for prim in pymesh.primitives:
-            verts, edges, faces = BlenderPrimitive.create(gltf, prim, verts, edges, faces)
+        for prim, prim_state in zip(pymesh.primitives, mesh_state.primitives):
+            verts, faces = BlenderPrimitive.create(gltf, prim, prim_state, verts, faces)
+
+        if verts:
+            verts = np.concatenate(verts)
+            faces = np.concatenate(faces)
+        else:
+            verts = np.zeros((0, 3), dtype=np.float32)
+            faces = np.zeros((0, 3), dtype=np.int32)
 
-        mesh.from_pydata(verts, edges, faces)
-        mesh.validate()
+        BlenderMesh.set_geometry(mesh, verts, faces)
 
-        pymesh.blender_name = mesh.name
+        mesh_state.blender_name = mesh.name
 
         return mesh
 
     @staticmethod
-    def set_mesh(gltf, pymesh, mesh, obj):
-        """Set all data after mesh creation."""
-        # Normals
+    def set_geometry(mesh, verts, faces):
+        """Fill mesh vertices and triangles in bulk, from (n, 3) arrays."""
+        mesh.vertices.add(len(verts))
+        mesh.vertices.foreach_set('co', np.ascontiguousarray(verts, dtype=np.float32).reshape(-1))
+
+        mesh.loops.add(3 * len(faces))
+        mesh.loops.foreach_set('vertex_index', np.ascontiguousarray(faces, dtype=np.int32).reshape(-1))
+
+        mesh.polygons.add(len(faces))
+        mesh.polygons.foreach_set('loop_start', np.arange(0, 3 * len(faces), 3, dtype=np.int32))
+        mesh.polygons.foreach_set('loop_total', np.full(len(faces), 3, dtype=np.int32))
+
+        mesh.update(calc_edges=True)
+
+        # Full validation is slow on big meshes, only run it when something looks wrong
+        if BlenderMesh.needs_validation(verts, faces):
+            mesh.validate()
+
+    @staticmethod
+    def needs_validation(verts, faces):
+        """Check for out of range indices, degenerate or duplicated triangles, and invalid coordinates."""
+        if len(faces) == 0:
+            return False
+
+        if faces.min() < 0 or faces.max() >= len(verts):
+            return True
+
+        if np.any((faces[:, 0] == faces[:, 1]) | (faces[:, 1] == faces[:, 2]) | (faces[:, 2] == faces[:, 0])):
+            return True
+
+        if len(np.unique(np.sort(faces, axis=1), axis=0)) != len(faces):
+            return True
+
+        return not np.all(np.isfinite(verts))
+
+    @staticmethod
+    def set_UV(gltf, mesh_idx, mesh):
+        """Set UV Maps, one per TEXCOORD_n attribute, for all primitives at once."""
+        pymesh = gltf.data.meshes[mesh_idx]
+        mesh_state = gltf.mesh_states[mesh_idx]
+        # Sorted by set index, so that TEXCOORD_10 comes after TEXCOORD_2
+        texcoords = sorted(set(
+            attr for prim in pymesh.primitives for attr in prim.attributes.keys()
+            if attr[:9] == "TEXCOORD_" and attr[9:].isdigit()
+        ), key=lambda attr: int(attr[9:]))
+        if not texcoords:
+            return
+
+        loop_vertex_indices = np.empty(len(mesh.loops), dtype=np.int32)
+        mesh.loops.foreach_get('vertex_index', loop_vertex_indices)
+
+        for texcoord in texcoords:
+            if bpy.app.version < (2, 80, 0):
+                if texcoord not in mesh.uv_textures:
+                    mesh.uv_textures.new(texcoord)
+            else:
+                if texcoord not in mesh.uv_layers:
+                    mesh.uv_layers.new(name=texcoord)
+
+            # UV per vertex, for vertices of primitives using this TEXCOORD
+            vertex_uvs = np.zeros((len(mesh.vertices), 2), dtype=np.float32)
+            vertex_has_uv = np.zeros(len(mesh.vertices), dtype=bool)
+            offset = 0
+            for prim, prim_state in zip(pymesh.primitives, mesh_state.primitives):
+                if texcoord in prim.attributes.keys():
+                    prim_state.blender_texcoord[int(texcoord[9:])] = texcoord
+                    texcoord_data = BinaryData.decode_accessor(gltf, prim.attributes[texcoord])
+                    vertex_uvs[offset:offset + prim_state.vertices_length] = texcoord_data[prim_state.vertex_remap]
+                    vertex_has_uv[offset:offset + prim_state.vertices_length] = True
+                offset = offset + prim_state.vertices_length
+
+            # glTF UV origin is top left, Blender one is bottom left
+            vertex_uvs[:, 1] = 1 - vertex_uvs[:, 1]
+
+            # Loops of primitives without this TEXCOORD keep their initial value
+            uv_layer = mesh.uv_layers[texcoord]
+            loop_uvs = np.empty((len(mesh.loops), 2), dtype=np.float32)
+            uv_layer.data.foreach_get('uv', loop_uvs.reshape(-1))
+            loop_has_uv = vertex_has_uv[loop_vertex_indices]
+            loop_uvs[loop_has_uv] = vertex_uvs[loop_vertex_indices[loop_has_uv]]
+            uv_layer.data.foreach_set('uv', loop_uvs.reshape(-1))
+
+    @staticmethod
+    def set_normals(gltf, mesh_idx, mesh):
+        """Set smooth/flat shading of polygons, for all primitives at once.
+
+        Returns glTF normals of vertices as a (n, 3) float32 array, zero for vertices without NORMAL.
+        """
+        pymesh = gltf.data.meshes[mesh_idx]
+        mesh_state = gltf.mesh_states[mesh_idx]
+
+        vertex_normals = np.zeros((len(mesh.vertices), 3), dtype=np.float32)
+        vertex_has_normal = np.zeros(len(mesh.vertices), dtype=bool)
         offset = 0
-        custom_normals = [[0.0, 0.0, 0.0]] * len(mesh.vertices)
+        for prim, prim_state in zip(pymesh.primitives, mesh_state.primitives):
+            if 'NORMAL' in prim.attributes.keys():
+                normal_data = BinaryData.decode_accessor(gltf, prim.attributes['NORMAL'])
+                vertex_normals[offset:offset + prim_state.vertices_length] = normal_data[prim_state.vertex_remap]
+                vertex_has_normal[offset:offset + prim_state.vertices_length] = True
+            offset = offset + prim_state.vertices_length
+
+        # Polygons are triangles, and never share vertices with an other primitive
+        poly_loop_starts = np.empty(len(mesh.polygons), dtype=np.int32)
+        mesh.polygons.foreach_get('loop_start', poly_loop_starts)
+        loop_vertex_indices = np.empty(len(mesh.loops), dtype=np.int32)
+        mesh.loops.foreach_get('vertex_index', loop_vertex_indices)
+        poly_verts = loop_vertex_indices[poly_loop_starts[:, np.newaxis] + np.arange(3)]
+
+        # Shading is only set on polygons of primitives with normals, others keep flat default
+        poly_smooth = vertex_has_normal[poly_verts[:, 0]]
+
+        if gltf.import_settings['import_shading'] == "NORMALS":
+            # Smooth if a vertex normal is not the face normal
+            vert_cos = np.empty((len(mesh.vertices), 3), dtype=np.float32)
+            mesh.vertices.foreach_get('co', vert_cos.reshape(-1))
+            tri_cos = vert_cos[poly_verts].astype(np.float64)
+            face_normals = np.cross(tri_cos[:, 1] - tri_cos[:, 0], tri_cos[:, 2] - tri_cos[:, 0])
+            lengths = np.linalg.norm(face_normals, axis=1)
+            face_normals[lengths > 0] /= lengths[lengths > 0, np.newaxis]
+
+            dots = np.einsum('ij,ikj->ik', face_normals, vertex_normals[poly_verts])
+            poly_smooth &= ~np.all(dots > 0.9999999, axis=1)
+        elif gltf.import_settings['import_shading'] == "FLAT":
+            poly_smooth[:] = False
+        elif gltf.import_settings['import_shading'] == "SMOOTH":
+            pass
+        else:
+            poly_smooth[:] = False  # Should not happend
+
+        mesh.polygons.foreach_set('use_smooth', poly_smooth)
+
+        return vertex_normals
+
+    @staticmethod
+    def set_mesh(gltf, mesh_idx, mesh, obj):
+        """Set all data after mesh creation."""
+        pymesh = gltf.data.meshes[mesh_idx]
+        mesh_state = gltf.mesh_states[mesh_idx]
 
+        # Normals
         if gltf.import_settings['import_shading'] == "NORMALS":
             mesh.create_normals_split()
 
-        for prim in pymesh.primitives:
-            offset = BlenderPrimitive.set_normals(gltf, prim, mesh, offset, custom_normals)
+        custom_normals = BlenderMesh.set_normals(gltf, mesh_idx, mesh)
 
         mesh.update()
 
         # manage UV
-        offset = 0
-        for prim in pymesh.primitives:
-            offset = BlenderPrimitive.set_UV(gltf, prim, obj, mesh, offset)
+        BlenderMesh.set_UV(gltf, mesh_idx, mesh)
 
         mesh.update()
 
@@ -79,11 +217,11 @@ class BlenderMesh():
             mesh.use_auto_smooth = True
 
         # Object and UV are now created, we can set UVMap into material
-        for prim in pymesh.primitives:
+        for prim, prim_state in zip(pymesh.primitives, mesh_state.primitives):
             vertex_color = None
             if 'COLOR_0' in prim.attributes.keys():
                 vertex_color = 'COLOR_0'
-            BlenderPrimitive.set_UV_in_mat(gltf, prim, obj, vertex_color)
+            BlenderPrimitive.set_UV_in_mat(gltf, prim, prim_state, obj, vertex_color)
 
         # Assign materials to mesh
         offset = 0
@@ -91,8 +229,10 @@ class BlenderMesh():
         bm = bmesh.new()
         bm.from_mesh(obj.data)
         bm.faces.ensure_lookup_table()
-        for prim in pymesh.primitives:
-            offset, cpt_index_mat = BlenderPrimitive.assign_material(gltf, prim, obj, bm, offset, cpt_index_mat)
+        for prim, prim_state in zip(pymesh.primitives, mesh_state.primitives):
+            offset, cpt_index_mat = BlenderPrimitive.assign_material(
+                gltf, prim, prim_state, obj, bm, offset, cpt_index_mat
+            )
 
         bm.to_mesh(obj.data)
         bm.free()
@@ -107,12 +247,17 @@ class BlenderMesh():
         # Create basis shape key
         if max_shape_to_create > 0:
             obj.shape_key_add(name="Basis")
+            basis_co = np.empty((len(mesh.vertices), 3), dtype=np.float32)
+            mesh.vertices.foreach_get('co', basis_co.reshape(-1))
 
         current_shapekey_index = 0
+        shapekey_name = None
         for sk in range(max_shape_to_create):
 
             # Check if this target has POSITION
-            if 'POSITION' not in prim.targets[sk].keys():
+            if not any(
+                    prim.targets and sk < len(prim.targets) and 'POSITION' in prim.targets[sk].keys()
+                    for prim in pymesh.primitives):
                 gltf.shapekeys[sk] = None
                 continue
 
@@ -125,47 +270,21 @@ class BlenderMesh():
             if shapekey_name is None:
                 shapekey_name = "target_" + str(sk)
 
-            obj.shape_key_add(name=shapekey_name)
+            key_block = obj.shape_key_add(name=shapekey_name)
             current_shapekey_index += 1
+            gltf.shapekeys[sk] = current_shapekey_index
 
+            # Shape is basis + target displacement, for vertices of primitives having this target
+            shape_co = basis_co.copy()
             offset_idx = 0
-            for prim in pymesh.primitives:
-                if prim.targets is None:
-                    continue
-                if sk >= len(prim.targets):
-                    continue
-
-                bm = bmesh.new()
-                bm.from_mesh(mesh)
-
-                shape_layer = bm.verts.layers.shape[current_shapekey_index]
-                gltf.shapekeys[sk] = current_shapekey_index
-
-                original_pos = BinaryData.get_data_from_accessor(gltf, prim.targets[sk]['POSITION'])
-
-                tmp_indices = {}
-                tmp_idx = 0
-                pos = []
-                for i in prim.tmp_indices:
-                    if i[0] not in tmp_indices.keys():
-                        tmp_indices[i[0]] = tmp_idx
-                        tmp_idx += 1
-                        pos.append(original_pos[i[0]])
-
-                for vert in bm.verts:
-                    if vert.index not in range(offset_idx, offset_idx + prim.vertices_length):
-                        continue
-
-                    shape = vert[shape_layer]
-
-                    co = loc_gltf_to_blender(list(pos[vert.index - offset_idx]))
-                    shape.x = obj.data.vertices[vert.index].co.x + co[0]
-                    shape.y = obj.data.vertices[vert.index].co.y + co[1]
-                    shape.z = obj.data.vertices[vert.index].co.z + co[2]
+            for prim, prim_state in zip(pymesh.primitives, mesh_state.primitives):
+                if prim.targets is not None and sk < len(prim.targets) and 'POSITION' in prim.targets[sk].keys():
+                    pos = BinaryData.decode_accessor(gltf, prim.targets[sk]['POSITION'])
+                    shape_co[offset_idx:offset_idx + prim_state.vertices_length] += \
+                        loc_gltf_to_blender(pos[prim_state.vertex_remap])
+                offset_idx += prim_state.vertices_length
 
-                bm.to_mesh(obj.data)
-                bm.free()
-                offset_idx += prim.vertices_length
+            key_block.data.foreach_set('co', shape_co.reshape(-1))
 
         # set default weights for shape keys, and names, if not set by convention on extras data
         if pymesh.weights is not None:
@@ -180,67 +299,48 @@ class BlenderMesh():
                                 gltf.data.accessors[pymesh.primitives[0].targets[i]['POSITION']].name
 
         # Apply vertex color.
-        vertex_color = None
+        BlenderMesh.set_vertex_colors(gltf, mesh_idx, mesh)
+
+    @staticmethod
+    def set_vertex_colors(gltf, mesh_idx, mesh):
+        """Set COLOR_0 vertex color layer, for all primitives at once."""
+        pymesh = gltf.data.meshes[mesh_idx]
+        mesh_state = gltf.mesh_states[mesh_idx]
+
+        if not any('COLOR_0' in prim.attributes.keys() for prim in pymesh.primitives):
+            return
+
+        # Create vertex color, once only per object
+        vertex_color = mesh.vertex_colors.new(name="COLOR_0")
+
+        if bpy.app.version < (2, 80, 0) and len(vertex_color.data) > 0:
+            # manage post 2.79b versions, that have alpha in vertex color
+            nb_components = len(vertex_color.data[0].color)
+        else:
+            nb_components = 4
+
+        vertex_colors = np.ones((len(mesh.vertices), 4), dtype=np.float32)
+        vertex_has_color = np.zeros(len(mesh.vertices), dtype=bool)
         offset = 0
-        for prim in pymesh.primitives:
+        for prim, prim_state in zip(pymesh.primitives, mesh_state.primitives):
             if 'COLOR_0' in prim.attributes.keys():
-                # Create vertex color, once only per object
-                if vertex_color is None:
-                    vertex_color = obj.data.vertex_colors.new(name="COLOR_0")
-
-                original_color_data = BinaryData.get_data_from_accessor(gltf, prim.attributes['COLOR_0'])
-
-                tmp_indices = {}
-                tmp_idx = 0
-                color_data = []
-                for i in prim.tmp_indices:
-                    if i[0] not in tmp_indices.keys():
-                        tmp_indices[i[0]] = tmp_idx
-                        tmp_idx += 1
-                        color_data.append(original_color_data[i[0]])
-
-                for poly in mesh.polygons:
-                    for loop_idx in range(poly.loop_start, poly.loop_start + poly.loop_total):
-                        vert_idx = mesh.loops[loop_idx].vertex_index
-                        if vert_idx in range(offset, offset + prim.vertices_length):
-                            cpt_idx = vert_idx - offset
-                            # Need to convert from linear (glTF to sRGB (blender))
-                            if bpy.app.version < (2, 80, 0):
-                                # manage post 2.79b versions
-                                if len(vertex_color.data[loop_idx].color) == 4:
-                                    if len(color_data[cpt_idx]) == 3:
-                                        # TODO : no alpha in vertex color
-                                        srgb_color = [
-                                            color_linear_to_srgb(color_data[cpt_idx][0]),
-                                            color_linear_to_srgb(color_data[cpt_idx][1]),
-                                            color_linear_to_srgb(color_data[cpt_idx][2]),
-                                            1.0]
-                                    else:
-                                        srgb_color = [
-                                            color_linear_to_srgb(color_data[cpt_idx][0]),
-                                            color_linear_to_srgb(color_data[cpt_idx][1]),
-                                            color_linear_to_srgb(color_data[cpt_idx][2]),
-                                            color_data[cpt_idx][3]]
-                                    vertex_color.data[loop_idx].color = srgb_color
-                                else:
-                                    srgb_color = [
-                                        color_linear_to_srgb(color_data[cpt_idx][0]),
-                                        color_linear_to_srgb(color_data[cpt_idx][1]),
-                                        color_linear_to_srgb(color_data[cpt_idx][2])]
-                                    vertex_color.data[loop_idx].color = srgb_color
-                            else:
-                                # check dimension, and add alpha if needed
-                                if len(color_data[cpt_idx]) == 3:
-                                    srgb_color = [
-                                        color_linear_to_srgb(color_data[cpt_idx][0]),
-                                        color_linear_to_srgb(color_data[cpt_idx][1]),
-                                        color_linear_to_srgb(color_data[cpt_idx][2]),
-                                        1.0]
-                                else:
-                                    srgb_color = [
-                                        color_linear_to_srgb(color_data[cpt_idx][0]),
-                                        color_linear_to_srgb(color_data[cpt_idx][1]),
-                                        color_linear_to_srgb(color_data[cpt_idx][2]),
-                                        color_data[cpt_idx][3]]
-                                vertex_color.data[loop_idx].color = srgb_color
-            offset = offset + prim.vertices_length
+                color_data = BinaryData.decode_accessor(gltf, prim.attributes['COLOR_0'])[prim_state.vertex_remap]
+
+                # Need to convert from linear (glTF to sRGB (blender))
+                vertex_colors[offset:offset + prim_state.vertices_length, :3] = \
+                    color_linear_to_srgb_array(color_data[:, :3])
+                # check dimension, alpha is 1.0 if not set
+                if color_data.shape[1] == 4:
+                    vertex_colors[offset:offset + prim_state.vertices_length, 3] = color_data[:, 3]
+                vertex_has_color[offset:offset + prim_state.vertices_length] = True
+            offset = offset + prim_state.vertices_length
+
+        loop_vertex_indices = np.empty(len(mesh.loops), dtype=np.int32)
+        mesh.loops.foreach_get('vertex_index', loop_vertex_indices)
+
+        # Loops of primitives without COLOR_0 keep their initial value
+        loop_colors = np.empty((len(mesh.loops), nb_components), dtype=np.float32)
+        vertex_color.data.foreach_get('color', loop_colors.reshape(-1))
+        loop_has_color = vertex_has_color[loop_vertex_indices]
+        loop_colors[loop_has_color] = vertex_colors[loop_vertex_indices[loop_has_color], :nb_components]
+        vertex_color.data.foreach_set('color', loop_colors.reshape(-1))
@@ -13,11 +13,12 @@
 # limitations under the License.
 
 import bpy
+from mathutils import Matrix
 from .gltf2_blender_mesh import BlenderMesh
 from .gltf2_blender_camera import BlenderCamera
 from .gltf2_blender_skin import BlenderSkin
 from .gltf2_blender_light import BlenderLight
-from ..com.gltf2_blender_conversion import scale_to_matrix, matrix_gltf_to_blender, correction_rotation
+from ..com.gltf2_blender_conversion import scale_to_matrix, correction_rotation
 
 
 class BlenderNode():
@@ -25,14 +26,40 @@ class BlenderNode():
     def __new__(cls, *args, **kwargs):
         raise RuntimeError("%s should not be instantiated" % cls)
 
+    @staticmethod
+    def get_nodes_in_hierarchy_order(gltf, root_node_ids):
+        """(node, parent) pairs of the trees of root nodes, each parent before its children.
+
+        Same depth first order as a recursive traversal, but with an explicit stack,
+        so that deep hierarchies don't hit the Python recursion limit.
+        """
+        nodes = []
+        visited = set()
+        stack = [(node_idx, None) for node_idx in reversed(root_node_ids)]
+        while stack:
+            node_idx, parent = stack.pop()
+            if node_idx in visited:
+                # Invalid file, node used twice in hierarchy
+                gltf.log.error("Node " + str(node_idx) + " is used more than once in hierarchy")
+                continue
+            visited.add(node_idx)
+            nodes.append((node_idx, parent))
+
+            children = gltf.data.nodes[node_idx].children
+            if children:
+                stack.extend((child_idx, node_idx) for child_idx in reversed(children))
+
+        return nodes
+
     @staticmethod
     def create(gltf, node_idx, parent):
-        """Node creation."""
+        """Node creation, without its children (parent must already be created)."""
         pynode = gltf.data.nodes[node_idx]
+        node_state = gltf.node_states[node_idx]
 
         # Blender attributes initialization
-        pynode.blender_object = ""
-        pynode.parent = parent
+        node_state.blender_object = ""
+        node_state.parent = parent
 
         gltf.display_current_node += 1
         if bpy.app.debug_value == 101:
@@ -41,18 +68,18 @@ class BlenderNode():
         if pynode.mesh is not None:
 
             instance = False
-            if gltf.data.meshes[pynode.mesh].blender_name is not None:
+            if gltf.mesh_states[pynode.mesh].blender_name is not None:
                 # Mesh is already created, only create instance
                 # Except is current node is animated with path weight
                 # Or if previous instance is animation at node level
-                if pynode.weight_animation is True:
+                if node_state.weight_animation is True:
                     instance = False
                 else:
-                    if gltf.data.meshes[pynode.mesh].is_weight_animated is True:
+                    if gltf.mesh_states[pynode.mesh].is_weight_animated is True:
                         instance = False
                     else:
                         instance = True
-                        mesh = bpy.data.meshes[gltf.data.meshes[pynode.mesh].blender_name]
+                        mesh = bpy.data.meshes[gltf.mesh_states[pynode.mesh].blender_name]
 
             if instance is False:
                 if pynode.name:
@@ -62,9 +89,9 @@ class BlenderNode():
 
                 mesh = BlenderMesh.create(gltf, pynode.mesh, node_idx, parent)
 
-            if pynode.weight_animation is True:
+            if node_state.weight_animation is True:
                 # flag this mesh instance as created only for this node, because of weight animation
-                gltf.data.meshes[pynode.mesh].is_weight_animated = True
+                gltf.mesh_states[pynode.mesh].is_weight_animated = True
 
             if pynode.name:
                 name = pynode.name
@@ -89,15 +116,11 @@ class BlenderNode():
             # See implementation node of gltf2 specification
             if not (pynode.mesh is not None and pynode.skin is not None):
                 BlenderNode.set_transforms(gltf, node_idx, pynode, obj, parent)
-            pynode.blender_object = obj.name
+            node_state.blender_object = obj.name
             BlenderNode.set_parent(gltf, obj, parent)
 
             if instance == False:
-                BlenderMesh.set_mesh(gltf, gltf.data.meshes[pynode.mesh], mesh, obj)
-
-            if pynode.children:
-                for child_idx in pynode.children:
-                    BlenderNode.create(gltf, child_idx, node_idx)
+                BlenderMesh.set_mesh(gltf, pynode.mesh, mesh, obj)
 
             return
 
@@ -108,29 +131,25 @@ class BlenderNode():
                 gltf.log.info("Blender create Camera node")
             obj = BlenderCamera.create(gltf, pynode.camera)
             BlenderNode.set_transforms(gltf, node_idx, pynode, obj, parent)  # TODO default rotation of cameras ?
-            pynode.blender_object = obj.name
+            node_state.blender_object = obj.name
             BlenderNode.set_parent(gltf, obj, parent)
 
-            if pynode.children:
-                for child_idx in pynode.children:
-                    BlenderNode.create(gltf, child_idx, node_idx)
-
             return
 
-        if pynode.is_joint:
+        if node_state.is_joint:
             if pynode.name:
                 gltf.log.info("Blender create Bone node " + pynode.name)
             else:
                 gltf.log.info("Blender create Bone node")
             # Check if corresponding armature is already created, create it if needed
-            if gltf.data.skins[pynode.skin_id].blender_armature_name is None:
-                BlenderSkin.create_armature(gltf, pynode.skin_id, parent)
-
-            BlenderSkin.create_bone(gltf, pynode.skin_id, node_idx, parent)
-
-            if pynode.children:
-                for child_idx in pynode.children:
-                    BlenderNode.create(gltf, child_idx, node_idx)
+            # All bones of the armature are created at once
+            if gltf.skin_states[node_state.skin_id].blender_armature_name is None:
+                BlenderSkin.create_armature(gltf, node_state.skin_id, parent)
+                if parent is None and node_idx in gltf.node_parents.keys():
+                    # Root joint of a partial import, keep world transform of its glTF parents
+                    armature = bpy.data.objects[gltf.skin_states[node_state.skin_id].blender_armature_name]
+                    armature.matrix_world = Matrix(gltf.node_world_matrices[gltf.node_parents[node_idx]].tolist())
+                BlenderSkin.create_bones(gltf, node_state.skin_id)
 
             return
 
@@ -139,14 +158,10 @@ class BlenderNode():
                 obj = BlenderLight.create(gltf, pynode.extensions['KHR_lights_punctual']['light'])
                 obj.rotation_mode = 'QUATERNION'
                 BlenderNode.set_transforms(gltf, node_idx, pynode, obj, parent, correction=True)
-                pynode.blender_object = obj.name
-                pynode.correction_needed = True
+                node_state.blender_object = obj.name
+                node_state.correction_needed = True
                 BlenderNode.set_parent(gltf, obj, parent)
 
-                if pynode.children:
-                    for child_idx in pynode.children:
-                        BlenderNode.create(gltf, child_idx, node_idx)
-
                 return
 
         # No mesh, no camera, no light. For now, create empty #TODO
@@ -167,83 +182,105 @@ class BlenderNode():
                 bpy.data.scenes[gltf.blender_scene].collection.objects.link(obj)
 
         BlenderNode.set_transforms(gltf, node_idx, pynode, obj, parent)
-        pynode.blender_object = obj.name
+        node_state.blender_object = obj.name
         BlenderNode.set_parent(gltf, obj, parent)
 
-        if pynode.children:
-            for child_idx in pynode.children:
-                BlenderNode.create(gltf, child_idx, node_idx)
-
     @staticmethod
     def set_parent(gltf, obj, parent):
         """Set parent."""
         if parent is None:
             return
 
-        for node_idx, node in enumerate(gltf.data.nodes):
-            if node_idx == parent:
-                if node.is_joint is True:
-                    bpy.ops.object.select_all(action='DESELECT')
-                    if bpy.app.version < (2, 80, 0):
-                        bpy.data.objects[node.blender_armature_name].select = True
-                        bpy.context.scene.objects.active = bpy.data.objects[node.blender_armature_name]
-                    else:
-                        bpy.data.objects[node.blender_armature_name].select_set(True)
-                        bpy.context.view_layer.objects.active = bpy.data.objects[node.blender_armature_name]
-
-                    bpy.ops.object.mode_set(mode='EDIT')
-                    bpy.data.objects[node.blender_armature_name].data.edit_bones.active = \
-                        bpy.data.objects[node.blender_armature_name].data.edit_bones[node.blender_bone_name]
-                    bpy.ops.object.mode_set(mode='OBJECT')
-                    bpy.ops.object.select_all(action='DESELECT')
-                    if bpy.app.version < (2, 80, 0):
-                        obj.select = True
-                        bpy.data.objects[node.blender_armature_name].select = True
-                        bpy.context.scene.objects.active = bpy.data.objects[node.blender_armature_name]
-                        bpy.context.scene.update()
-                    else:
-                        obj.select_set(True)
-                        bpy.data.objects[node.blender_armature_name].select_set(True)
-                        bpy.context.view_layer.objects.active = bpy.data.objects[node.blender_armature_name]
-                        bpy.context.view_layer.update()
-                    bpy.ops.object.parent_set(type='BONE_RELATIVE', keep_transform=True)
-                    # From world transform to local (-armature transform -bone transform)
-                    bone_trans = bpy.data.objects[node.blender_armature_name] \
-                        .pose.bones[node.blender_bone_name].matrix.to_translation().copy()
-                    bone_rot = bpy.data.objects[node.blender_armature_name] \
-                        .pose.bones[node.blender_bone_name].matrix.to_quaternion().copy()
-                    bone_scale_mat = scale_to_matrix(node.blender_bone_matrix.to_scale())
-                    if bpy.app.version < (2, 80, 0):
-                        obj.location = bone_scale_mat * obj.location
-                        obj.location = bone_rot * obj.location
-                        obj.location += bone_trans
-                        obj.location = bpy.data.objects[node.blender_armature_name].matrix_world.to_quaternion() \
-                            * obj.location
-                        obj.rotation_quaternion = obj.rotation_quaternion \
-                            * bpy.data.objects[node.blender_armature_name].matrix_world.to_quaternion()
-                        obj.scale = bone_scale_mat * obj.scale
-                    else:
-                        obj.location = bone_scale_mat @ obj.location
-                        obj.location = bone_rot @ obj.location
-                        obj.location += bone_trans
-                        obj.location = bpy.data.objects[node.blender_armature_name].matrix_world.to_quaternion() \
-                            @ obj.location
-                        obj.rotation_quaternion = obj.rotation_quaternion \
-                            @ bpy.data.objects[node.blender_armature_name].matrix_world.to_quaternion()
-                        obj.scale = bone_scale_mat @ obj.scale
-
-                    return
-                if node.blender_object:
-                    obj.parent = bpy.data.objects[node.blender_object]
-                    return
+        node_state = gltf.node_states[parent]
+        if node_state.is_joint is True:
+            armature = bpy.data.objects[node_state.blender_armature_name]
+
+            # Parent directly, without operators, as parent_set(type='BONE_RELATIVE') does:
+            # bone uses relative parenting, so children follow the bone local pose transform (chan_mat),
+            # and parent inverse is the inverse of armature world matrix * bone local pose transform,
+            # so object keeps its world transform.
+            armature_world = BlenderNode.get_world_matrix(armature)
+            armature.data.bones[node_state.blender_bone_name].use_relative_parent = True
+            obj.parent = armature
+            obj.parent_type = 'BONE'
+            obj.parent_bone = node_state.blender_bone_name
+            chan_mat = armature.pose.bones[node_state.blender_bone_name].matrix_basis
+            if bpy.app.version < (2, 80, 0):
+                obj.matrix_parent_inverse = (armature_world * chan_mat).inverted()
+            else:
+                obj.matrix_parent_inverse = (armature_world @ chan_mat).inverted()
+
+            # Parent matrix * parent inverse is identity for current pose, so basis is still the world
+            # transform, as after parent_set(keep_transform=True).
+            # From world transform to local (-armature transform -bone transform)
+            bone_trans = node_state.blender_bone_pose_matrix.to_translation()
+            bone_rot = node_state.blender_bone_pose_matrix.to_quaternion()
+            bone_scale_mat = scale_to_matrix(node_state.blender_bone_matrix.to_scale())
+            if bpy.app.version < (2, 80, 0):
+                obj.location = bone_scale_mat * obj.location
+                obj.location = bone_rot * obj.location
+                obj.location += bone_trans
+                obj.location = armature_world.to_quaternion() * obj.location
+                obj.rotation_quaternion = obj.rotation_quaternion * armature_world.to_quaternion()
+                obj.scale = bone_scale_mat * obj.scale
+            else:
+                obj.location = bone_scale_mat @ obj.location
+                obj.location = bone_rot @ obj.location
+                obj.location += bone_trans
+                obj.location = armature_world.to_quaternion() @ obj.location
+                obj.rotation_quaternion = obj.rotation_quaternion @ armature_world.to_quaternion()
+                obj.scale = bone_scale_mat @ obj.scale
+
+            return
+
+        if node_state.blender_object:
+            obj.parent = bpy.data.objects[node_state.blender_object]
+            return
 
         gltf.log.error("ERROR, parent not found")
 
+    @staticmethod
+    def get_world_matrix(obj):
+        """Compute world matrix of object from its parent chain, without updating the depsgraph."""
+        matrix = obj.matrix_basis.copy()
+        while obj.parent is not None:
+            if obj.parent_type == 'BONE' and obj.parent.data.bones[obj.parent_bone].use_relative_parent:
+                # Relative to bone local pose transform
+                chan_mat = obj.parent.pose.bones[obj.parent_bone].matrix_basis
+                if bpy.app.version < (2, 80, 0):
+                    matrix = chan_mat * obj.matrix_parent_inverse * matrix
+                else:
+                    matrix = chan_mat @ obj.matrix_parent_inverse @ matrix
+            elif obj.parent_type == 'BONE':
+                bone = obj.parent.data.bones[obj.parent_bone]
+                pose_matrix = BlenderSkin.get_pose_matrix(obj.parent, obj.parent_bone)
+                if bpy.app.version < (2, 80, 0):
+                    matrix = pose_matrix * Matrix.Translation((0.0, bone.length, 0.0)) \
+                        * obj.matrix_parent_inverse * matrix
+                else:
+                    matrix = pose_matrix @ Matrix.Translation((0.0, bone.length, 0.0)) \
+                        @ obj.matrix_parent_inverse @ matrix
+            else:
+                if bpy.app.version < (2, 80, 0):
+                    matrix = obj.matrix_parent_inverse * matrix
+                else:
+                    matrix = obj.matrix_parent_inverse @ matrix
+
+            obj = obj.parent
+            if bpy.app.version < (2, 80, 0):
+                matrix = obj.matrix_basis * matrix
+            else:
+                matrix = obj.matrix_basis @ matrix
+
+        return matrix
+
     @staticmethod
     def set_transforms(gltf, node_idx, pynode, obj, parent, correction=False):
         """Set transforms."""
+        matrix = Matrix(gltf.node_matrices[node_idx].tolist())
         if parent is None:
-            obj.matrix_world = matrix_gltf_to_blender(pynode.transform)
+            # Node can be a root of a partial import, keep transforms of its glTF parents
+            obj.matrix_world = Matrix(gltf.node_world_matrices[node_idx].tolist())
             if correction is True:
                 if bpy.app.version < (2, 80, 0):
                     obj.matrix_world = obj.matrix_world * correction_rotation()
@@ -251,21 +288,17 @@ class BlenderNode():
                     obj.matrix_world = obj.matrix_world @ correction_rotation()
             return
 
-        for idx, node in enumerate(gltf.data.nodes):
-            if idx == parent:
-                if node.is_joint is True:
-                    obj.matrix_world = matrix_gltf_to_blender(pynode.transform)
-                    if correction is True:
-                        if bpy.app.version < (2, 80, 0):
-                            obj.matrix_world = obj.matrix_world * correction_rotation()
-                        else:
-                            obj.matrix_world = obj.matrix_world @ correction_rotation()
-                    return
+        if gltf.node_states[parent].is_joint is True:
+            obj.matrix_world = matrix
+            if correction is True:
+                if bpy.app.version < (2, 80, 0):
+                    obj.matrix_world = obj.matrix_world * correction_rotation()
+                else:
+                    obj.matrix_world = obj.matrix_world @ correction_rotation()
+        else:
+            if correction is True:
+                if bpy.app.version < (2, 80, 0):
+                    obj.matrix_world = obj.matrix_world * correction_rotation()
                 else:
-                    if correction is True:
-                        if bpy.app.version < (2, 80, 0):
-                            obj.matrix_world = obj.matrix_world * correction_rotation()
-                        else:
-                            obj.matrix_world = obj.matrix_world @ correction_rotation()
-                    obj.matrix_world = matrix_gltf_to_blender(pynode.transform)
-                    return
+                    obj.matrix_world = obj.matrix_world @ correction_rotation()
+            obj.matrix_world = matrix
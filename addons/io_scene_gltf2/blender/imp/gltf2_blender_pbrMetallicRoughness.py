@@ -22,13 +22,13 @@ class BlenderPbr():
     def __new__(cls, *args, **kwargs):
         raise RuntimeError("%s should not be instantiated" % cls)
 
-    def create(gltf, pypbr, mat_name, vertex_color):
+    def create(gltf, pypbr, material_state, mat_name, vertex_color):
         """Pbr creation."""
         engine = bpy.context.scene.render.engine
         if engine in ['CYCLES', 'BLENDER_EEVEE']:
-            BlenderPbr.create_nodetree(gltf, pypbr, mat_name, vertex_color)
+            BlenderPbr.create_nodetree(gltf, pypbr, material_state, mat_name, vertex_color)
 
-    def create_nodetree(gltf, pypbr, mat_name, vertex_color, nodetype='principled'):
+    def create_nodetree(gltf, pypbr, material_state, mat_name, vertex_color, nodetype='principled'):
         """Nodetree creation."""
         material = bpy.data.materials[mat_name]
         material.use_nodes = True
@@ -36,7 +36,7 @@ class BlenderPbr():
 
         # If there is no diffuse texture, but only a color, wihtout
         # vertex_color, we set this color in viewport color
-        if pypbr.color_type == gltf.SIMPLE and not vertex_color:
+        if material_state.color_type == gltf.SIMPLE and not vertex_color:
             if bpy.app.version < (2, 80, 0):
                 material.diffuse_color = pypbr.base_color_factor[:3]
             else:
@@ -62,7 +62,7 @@ class BlenderPbr():
             main_node = node_tree.nodes.new('ShaderNodeEmission')
             main_node.location = 750, -300
 
-        if pypbr.color_type == gltf.SIMPLE:
+        if material_state.color_type == gltf.SIMPLE:
 
             if not vertex_color:
 
@@ -92,7 +92,7 @@ class BlenderPbr():
                 node_tree.links.new(rgb_node.inputs['Color2'], attribute_node.outputs[0])
                 node_tree.links.new(main_node.inputs[0], rgb_node.outputs[0])
 
-        elif pypbr.color_type == gltf.TEXTURE_FACTOR:
+        elif material_state.color_type == gltf.TEXTURE_FACTOR:
 
             # TODO alpha ?
             if vertex_color:
@@ -109,10 +109,10 @@ class BlenderPbr():
 
             # create UV Map / Mapping / Texture nodes / separate & math and combine
             text_node = node_tree.nodes.new('ShaderNodeTexImage')
-            if gltf.data.images[
+            if gltf.image_states[
                 gltf.data.textures[pypbr.base_color_texture.index].source
             ].blender_image_name is not None:
-                text_node.image = bpy.data.images[gltf.data.images[
+                text_node.image = bpy.data.images[gltf.image_states[
                     gltf.data.textures[pypbr.base_color_texture.index].source
                 ].blender_image_name]
             text_node.label = 'BASE COLOR'
@@ -161,7 +161,7 @@ class BlenderPbr():
             node_tree.links.new(text_node.inputs[0], mapping.outputs[0])
             node_tree.links.new(mult_node.inputs[1], text_node.outputs[0])
 
-        elif pypbr.color_type == gltf.TEXTURE:
+        elif material_state.color_type == gltf.TEXTURE:
 
             BlenderTextureInfo.create(gltf, pypbr.base_color_texture)
 
@@ -178,10 +178,10 @@ class BlenderPbr():
 
             # create UV Map / Mapping / Texture nodes / separate & math and combine
             text_node = node_tree.nodes.new('ShaderNodeTexImage')
-            if gltf.data.images[
+            if gltf.image_states[
                 gltf.data.textures[pypbr.base_color_texture.index].source
             ].blender_image_name is not None:
-                text_node.image = bpy.data.images[gltf.data.images[
+                text_node.image = bpy.data.images[gltf.image_states[
                     gltf.data.textures[pypbr.base_color_texture.index].source
                 ].blender_image_name]
             text_node.label = 'BASE COLOR'
@@ -230,14 +230,14 @@ class BlenderPbr():
 
         if nodetype == 'principled':
             # Says metallic, but it means metallic & Roughness values
-            if pypbr.metallic_type == gltf.SIMPLE:
+            if material_state.metallic_type == gltf.SIMPLE:
                 main_node.inputs[4].default_value = pypbr.metallic_factor
                 main_node.inputs[7].default_value = pypbr.roughness_factor
 
-            elif pypbr.metallic_type == gltf.TEXTURE:
+            elif material_state.metallic_type == gltf.TEXTURE:
                 BlenderTextureInfo.create(gltf, pypbr.metallic_roughness_texture)
                 metallic_text = node_tree.nodes.new('ShaderNodeTexImage')
-                metallic_text.image = bpy.data.images[gltf.data.images[
+                metallic_text.image = bpy.data.images[gltf.image_states[
                     gltf.data.textures[pypbr.metallic_roughness_texture.index].source
                 ].blender_image_name]
                 if bpy.app.version < (2, 80, 0):
@@ -270,11 +270,11 @@ class BlenderPbr():
                 node_tree.links.new(metallic_mapping.inputs[0], metallic_uvmap.outputs[0])
                 node_tree.links.new(metallic_text.inputs[0], metallic_mapping.outputs[0])
 
-            elif pypbr.metallic_type == gltf.TEXTURE_FACTOR:
+            elif material_state.metallic_type == gltf.TEXTURE_FACTOR:
 
                 BlenderTextureInfo.create(gltf, pypbr.metallic_roughness_texture)
                 metallic_text = node_tree.nodes.new('ShaderNodeTexImage')
-                metallic_text.image = bpy.data.images[gltf.data.images[
+                metallic_text.image = bpy.data.images[gltf.image_states[
                     gltf.data.textures[pypbr.metallic_roughness_texture.index].source
                 ].blender_image_name]
                 if bpy.app.version < (2, 80, 0):
@@ -338,7 +338,7 @@ class BlenderPbr():
             mix.location = 1000, 0
             path = node_tree.nodes.new('ShaderNodeLightPath')
             path.location = 500, 300
-            if pypbr.color_type != gltf.SIMPLE:
+            if material_state.color_type != gltf.SIMPLE:
                 math = node_tree.nodes.new('ShaderNodeMath')
                 math.location = 750, 200
                 math.operation = 'MULTIPLY'
@@ -356,7 +356,7 @@ class BlenderPbr():
             node_tree.links.new(output_node.inputs[0], mix.outputs[0])
             node_tree.links.new(mix.inputs[2], main_node.outputs[0])
             node_tree.links.new(mix.inputs[1], transparent.outputs[0])
-            if pypbr.color_type != gltf.SIMPLE:
+            if material_state.color_type != gltf.SIMPLE:
                 node_tree.links.new(math.inputs[0], path.outputs[0])
                 node_tree.links.new(math.inputs[1], text_node.outputs[1])
                 node_tree.links.new(mix.inputs[0], math.outputs[0])
@@ -26,8 +26,8 @@ class BlenderScene():
         raise RuntimeError("%s should not be instantiated" % cls)
 
     @staticmethod
-    def create(gltf, scene_idx):
-        """Scene creation."""
+    def create(gltf, scene_idx, root_nodes=None):
+        """Scene creation. root_nodes replaces root nodes of scene, for partial import."""
         gltf.blender_active_collection = None
         if scene_idx is not None:
             pyscene = gltf.data.scenes[scene_idx]
@@ -81,6 +81,9 @@ class BlenderScene():
             gltf.blender_scene = scene.name
             list_nodes = BlenderScene.get_root_nodes(gltf)
 
+        if root_nodes is not None:
+            list_nodes = root_nodes
+
         if bpy.app.debug_value != 100:
             # Create Yup2Zup empty
             obj_rotation = bpy.data.objects.new("Yup2Zup", None)
@@ -95,22 +98,27 @@ class BlenderScene():
                 else:
                     bpy.data.scenes[gltf.blender_scene].collection.objects.link(obj_rotation)
 
+        # All nodes of the scene, parents before children (no recursion, hierarchies can be deep)
         if list_nodes is not None:
-            for node_idx in list_nodes:
-                BlenderNode.create(gltf, node_idx, None)  # None => No parent
+            nodes = BlenderNode.get_nodes_in_hierarchy_order(gltf, list_nodes)
+        else:
+            nodes = []
+
+        for node_idx, parent in nodes:
+            BlenderNode.create(gltf, node_idx, parent)  # None => No parent
 
         # Now that all mesh / bones are created, create vertex groups on mesh
         if gltf.data.skins:
-            for skin_id, skin in enumerate(gltf.data.skins):
-                if hasattr(skin, "node_ids"):
+            for skin_id, skin_state in enumerate(gltf.skin_states):
+                if skin_state.node_ids:
                     BlenderSkin.create_vertex_groups(gltf, skin_id)
 
-            for skin_id, skin in enumerate(gltf.data.skins):
-                if hasattr(skin, "node_ids"):
+            for skin_id, skin_state in enumerate(gltf.skin_states):
+                if skin_state.node_ids:
                     BlenderSkin.assign_vertex_groups(gltf, skin_id)
 
-            for skin_id, skin in enumerate(gltf.data.skins):
-                if hasattr(skin, "node_ids"):
+            for skin_id, skin_state in enumerate(gltf.skin_states):
+                if skin_state.node_ids:
                     BlenderSkin.create_armature_modifiers(gltf, skin_id)
 
         if gltf.data.animations:
@@ -118,14 +126,13 @@ class BlenderScene():
             for anim_idx, anim in enumerate(gltf.data.animations):
                 gltf.current_animation_names = {}
                 gltf.actions_stashed= {}
-                if list_nodes is not None:
-                    for node_idx in list_nodes:
-                        BlenderAnimation.anim(gltf, anim_idx, node_idx)
+                for node_idx, _ in nodes:
+                    BlenderAnimation.anim(gltf, anim_idx, node_idx)
                 for an in gltf.current_animation_names.values():
                     gltf.animation_managed.append(an)
-                    for node_idx in list_nodes:
+                    for node_idx, _ in nodes:
                         BlenderAnimation.stash_action(gltf, anim_idx, node_idx, an)
-            for node_idx in list_nodes:
+            for node_idx, _ in nodes:
                 BlenderAnimation.restore_last_action(gltf, node_idx)
 
         if bpy.app.debug_value != 100:
@@ -133,16 +140,16 @@ class BlenderScene():
             if list_nodes is not None:
                 exclude_nodes = []
                 for node_idx in list_nodes:
-                    if gltf.data.nodes[node_idx].is_joint:
+                    if gltf.node_states[node_idx].is_joint:
                         # Do not change parent if root node is already parented (can be the case for skinned mesh)
-                        if not bpy.data.objects[gltf.data.nodes[node_idx].blender_armature_name].parent:
-                            bpy.data.objects[gltf.data.nodes[node_idx].blender_armature_name].parent = obj_rotation
+                        if not bpy.data.objects[gltf.node_states[node_idx].blender_armature_name].parent:
+                            bpy.data.objects[gltf.node_states[node_idx].blender_armature_name].parent = obj_rotation
                         else:
                             exclude_nodes.append(node_idx)
                     else:
                         # Do not change parent if root node is already parented (can be the case for skinned mesh)
-                        if not bpy.data.objects[gltf.data.nodes[node_idx].blender_object].parent:
-                            bpy.data.objects[gltf.data.nodes[node_idx].blender_object].parent = obj_rotation
+                        if not bpy.data.objects[gltf.node_states[node_idx].blender_object].parent:
+                            bpy.data.objects[gltf.node_states[node_idx].blender_object].parent = obj_rotation
                         else:
                             exclude_nodes.append(node_idx)
 
@@ -157,12 +164,12 @@ class BlenderScene():
                                 continue # for root node that are parented by the process
                                 # for example skinned meshes
 
-                            if gltf.data.nodes[node_idx].is_joint:
-                                bpy.data.objects[gltf.data.nodes[node_idx].blender_armature_name].select = True
-                                bpy.context.scene.objects.active = bpy.data.objects[gltf.data.nodes[node_idx].blender_armature_name]
+                            if gltf.node_states[node_idx].is_joint:
+                                bpy.data.objects[gltf.node_states[node_idx].blender_armature_name].select = True
+                                bpy.context.scene.objects.active = bpy.data.objects[gltf.node_states[node_idx].blender_armature_name]
                             else:
-                                bpy.data.objects[gltf.data.nodes[node_idx].blender_object].select = True
-                                bpy.context.scene.objects.active = bpy.data.objects[gltf.data.nodes[node_idx].blender_object]
+                                bpy.data.objects[gltf.node_states[node_idx].blender_object].select = True
+                                bpy.context.scene.objects.active = bpy.data.objects[gltf.node_states[node_idx].blender_object]
                             bpy.ops.object.parent_clear(type='CLEAR_KEEP_TRANSFORM')
 
                         # remove object
@@ -184,13 +191,13 @@ class BlenderScene():
 
                             for obj_ in bpy.context.scene.objects:
                                 obj_.select_set(False)
-                            if gltf.data.nodes[node_idx].is_joint:
-                                bpy.data.objects[gltf.data.nodes[node_idx].blender_armature_name].select_set(True)
-                                bpy.context.view_layer.objects.active = bpy.data.objects[gltf.data.nodes[node_idx].blender_armature_name]
+                            if gltf.node_states[node_idx].is_joint:
+                                bpy.data.objects[gltf.node_states[node_idx].blender_armature_name].select_set(True)
+                                bpy.context.view_layer.objects.active = bpy.data.objects[gltf.node_states[node_idx].blender_armature_name]
 
                             else:
-                                bpy.data.objects[gltf.data.nodes[node_idx].blender_object].select_set(True)
-                                bpy.context.view_layer.objects.active = bpy.data.objects[gltf.data.nodes[node_idx].blender_object]
+                                bpy.data.objects[gltf.node_states[node_idx].blender_object].select_set(True)
+                                bpy.context.view_layer.objects.active = bpy.data.objects[gltf.node_states[node_idx].blender_object]
 
                             bpy.ops.object.parent_clear(type='CLEAR_KEEP_TRANSFORM')
 
@@ -203,28 +210,27 @@ class BlenderScene():
                             bpy.data.collections[gltf.blender_active_collection].hide_viewport = gltf.collection_hide_viewport
                             # TODO restore visibility when expose in bpy
 
-        # Make first root object the new active one
-        if list_nodes is not None:
-            if bpy.app.version < (2, 80, 0):
-                bpy.context.scene.objects.active = bpy.data.objects[gltf.data.nodes[list_nodes[0]].blender_object]
+        # Make first root object the new active one (armature, if root is a joint)
+        if list_nodes:
+            first_root = gltf.node_states[list_nodes[0]]
+            if first_root.is_joint:
+                active_name = first_root.blender_armature_name
             else:
-                bpy.context.view_layer.objects.active = bpy.data.objects[gltf.data.nodes[list_nodes[0]].blender_object]
+                active_name = first_root.blender_object
+            if active_name in bpy.data.objects:
+                if bpy.app.version < (2, 80, 0):
+                    bpy.context.scene.objects.active = bpy.data.objects[active_name]
+                else:
+                    bpy.context.view_layer.objects.active = bpy.data.objects[active_name]
 
     @staticmethod
     def get_root_nodes(gltf):
         if gltf.data.nodes is None:
             return None
 
-        parents = {}
-        for idx, node  in enumerate(gltf.data.nodes):
-            pynode = gltf.data.nodes[idx]
-            if pynode.children:
-                for child_idx in pynode.children:
-                    parents[child_idx] = idx
-
         roots = []
         for idx, node in enumerate(gltf.data.nodes):
-            if idx not in parents.keys():
+            if idx not in gltf.node_parents.keys():
                 roots.append(idx)
 
         return roots
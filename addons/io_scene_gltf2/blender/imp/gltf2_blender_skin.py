@@ -14,8 +14,9 @@
 
 
 import bpy
+import numpy as np
 from mathutils import Vector, Matrix
-from ..com.gltf2_blender_conversion import matrix_gltf_to_blender, scale_to_matrix
+from ..com.gltf2_blender_conversion import scale_to_matrix
 from ...io.imp.gltf2_io_binary import BinaryData
 
 
@@ -44,98 +45,118 @@ class BlenderSkin():
             else:
                 bpy.data.scenes[gltf.blender_scene].collection.objects.link(obj)
 
-        pyskin.blender_armature_name = obj.name
+        gltf.skin_states[skin_id].blender_armature_name = obj.name
         if parent is not None:
-            obj.parent = bpy.data.objects[gltf.data.nodes[parent].blender_object]
+            obj.parent = bpy.data.objects[gltf.node_states[parent].blender_object]
 
     @staticmethod
-    def set_bone_transforms(gltf, skin_id, bone, node_id, parent):
-        """Set bone transformations."""
+    def get_bind_matrices(gltf, skin_id, node_ids):
+        """Compute bind matrices (in Blender format) of joints, in batch from inverse bind matrices."""
         pyskin = gltf.data.skins[skin_id]
-        pynode = gltf.data.nodes[node_id]
-
-        obj = bpy.data.objects[pyskin.blender_armature_name]
-
-        # Set bone bind_pose by inverting bindpose matrix
-        if node_id in pyskin.joints:
-            index_in_skel = pyskin.joints.index(node_id)
-            if pyskin.inverse_bind_matrices is not None:
-                inverse_bind_matrices = BinaryData.get_data_from_accessor(gltf, pyskin.inverse_bind_matrices)
-                # Needed to keep scale in matrix, as bone.matrix seems to drop it
-                if index_in_skel < len(inverse_bind_matrices):
-                    pynode.blender_bone_matrix = matrix_gltf_to_blender(
-                        inverse_bind_matrices[index_in_skel]
-                    ).inverted()
-                    bone.matrix = pynode.blender_bone_matrix
-                else:
-                    gltf.log.error("Error with inverseBindMatrix for skin " + pyskin)
+
+        if pyskin.inverse_bind_matrices is None:
+            return {node_id: Matrix() for node_id in node_ids}  # 4x4 identity matrix
+
+        inverse_bind_matrices = BinaryData.decode_accessor(gltf, pyskin.inverse_bind_matrices)
+        # glTF matrices are column major
+        inverse_bind_matrices = inverse_bind_matrices.reshape(-1, 4, 4).transpose(0, 2, 1).astype(np.float64)
+        # Needed to keep scale in matrix, as bone.matrix seems to drop it
+        bind_matrices = np.linalg.inv(inverse_bind_matrices).tolist()
+
+        matrices = {}
+        for node_id in node_ids:
+            index_in_skel = gltf.joint_skins[node_id][1]
+            if index_in_skel < len(bind_matrices):
+                matrices[node_id] = Matrix(bind_matrices[index_in_skel])
             else:
-                pynode.blender_bone_matrix = Matrix() # 4x4 identity matrix
-        else:
-            print('No invBindMatrix for bone ' + str(node_id))
-            pynode.blender_bone_matrix = Matrix()
+                gltf.log.error("Error with inverseBindMatrix for skin " + str(skin_id))
+                matrices[node_id] = Matrix()
+        return matrices
 
-        # Parent the bone
-        if parent is not None and hasattr(gltf.data.nodes[parent], "blender_bone_name"):
-            bone.parent = obj.data.edit_bones[gltf.data.nodes[parent].blender_bone_name]  # TODO if in another scene
+    @staticmethod
+    def get_joints_in_hierarchy_order(gltf, skin_id, parents):
+        """Joints of skin managed by this armature, each parent before its children."""
+        pyskin = gltf.data.skins[skin_id]
 
-        # Switch to Pose mode
-        bpy.ops.object.mode_set(mode="POSE")
-        obj.data.pose_position = 'POSE'
+        # A joint used by multiple skins is created in the armature of its first skin
+        skin_joints = set(joint for joint in pyskin.joints if gltf.node_states[joint].skin_id == skin_id)
+
+        ordered_joints = []
+        done = set()
+        for joint in pyskin.joints:
+            chain = []
+            node_id = joint
+            while node_id is not None and node_id in skin_joints and node_id not in done:
+                chain.append(node_id)
+                done.add(node_id)
+                node_id = parents.get(node_id)
+            ordered_joints.extend(reversed(chain))
+
+        return ordered_joints
+
+    @staticmethod
+    def set_bone_transforms(gltf, skin_id, node_id, parent):
+        """Set pose bone transformations."""
+        node_state = gltf.node_states[node_id]
+
+        obj = bpy.data.objects[gltf.skin_states[skin_id].blender_armature_name]
 
         # Set posebone location/rotation/scale (in armature space)
         # location is actual bone location minus it's original (bind) location
-        bind_location = Matrix.Translation(pynode.blender_bone_matrix.to_translation())
-        bind_rotation = pynode.blender_bone_matrix.to_quaternion()
-        bind_scale = scale_to_matrix(pynode.blender_bone_matrix.to_scale())
+        bind_location = Matrix.Translation(node_state.blender_bone_matrix.to_translation())
+        bind_rotation = node_state.blender_bone_matrix.to_quaternion()
+        bind_scale = scale_to_matrix(node_state.blender_bone_matrix.to_scale())
 
-        location, rotation, scale = matrix_gltf_to_blender(pynode.transform).decompose()
-        if parent is not None and hasattr(gltf.data.nodes[parent], "blender_bone_matrix"):
-            parent_mat = gltf.data.nodes[parent].blender_bone_matrix
+        location, rotation, scale = Matrix(gltf.node_matrices[node_id].tolist()).decompose()
+        if parent is not None and gltf.node_states[parent].blender_bone_matrix is not None:
+            parent_mat = gltf.node_states[parent].blender_bone_matrix
 
             # Get armature space location (bindpose + pose)
             # Then, remove original bind location from armspace location, and bind rotation
             if bpy.app.version < (2, 80, 0):
                 final_location = (bind_location.inverted() * parent_mat * Matrix.Translation(location)).to_translation()
-                obj.pose.bones[pynode.blender_bone_name].location = \
+                obj.pose.bones[node_state.blender_bone_name].location = \
                     bind_rotation.inverted().to_matrix().to_4x4() * final_location
             else:
                 final_location = (bind_location.inverted() @ parent_mat @ Matrix.Translation(location)).to_translation()
-                obj.pose.bones[pynode.blender_bone_name].location = \
+                obj.pose.bones[node_state.blender_bone_name].location = \
                     bind_rotation.inverted().to_matrix().to_4x4() @ final_location
 
             # Do the same for rotation
             if bpy.app.version < (2, 80, 0):
-                obj.pose.bones[pynode.blender_bone_name].rotation_quaternion = \
+                obj.pose.bones[node_state.blender_bone_name].rotation_quaternion = \
                     (bind_rotation.
                         to_matrix().to_4x4().inverted() * parent_mat * rotation.to_matrix().to_4x4()).to_quaternion()
-                obj.pose.bones[pynode.blender_bone_name].scale = \
+                obj.pose.bones[node_state.blender_bone_name].scale = \
                     (bind_scale.inverted() * parent_mat * scale_to_matrix(scale)).to_scale()
             else:
-                obj.pose.bones[pynode.blender_bone_name].rotation_quaternion = \
+                obj.pose.bones[node_state.blender_bone_name].rotation_quaternion = \
                     (bind_rotation.to_matrix().to_4x4().inverted() @ parent_mat @
                         rotation.to_matrix().to_4x4()).to_quaternion()
-                obj.pose.bones[pynode.blender_bone_name].scale = \
+                obj.pose.bones[node_state.blender_bone_name].scale = \
                     (bind_scale.inverted() @ parent_mat @ scale_to_matrix(scale)).to_scale()
 
         else:
             if bpy.app.version < (2, 80, 0):
-                obj.pose.bones[pynode.blender_bone_name].location = bind_location.inverted() * location
-                obj.pose.bones[pynode.blender_bone_name].rotation_quaternion = bind_rotation.inverted() * rotation
-                obj.pose.bones[pynode.blender_bone_name].scale = bind_scale.inverted() * scale
+                obj.pose.bones[node_state.blender_bone_name].location = bind_location.inverted() * location
+                obj.pose.bones[node_state.blender_bone_name].rotation_quaternion = bind_rotation.inverted() * rotation
+                obj.pose.bones[node_state.blender_bone_name].scale = bind_scale.inverted() * scale
             else:
-                obj.pose.bones[pynode.blender_bone_name].location = bind_location.inverted() @ location
-                obj.pose.bones[pynode.blender_bone_name].rotation_quaternion = bind_rotation.inverted() @ rotation
-                obj.pose.bones[pynode.blender_bone_name].scale = bind_scale.inverted() @ scale
+                obj.pose.bones[node_state.blender_bone_name].location = bind_location.inverted() @ location
+                obj.pose.bones[node_state.blender_bone_name].rotation_quaternion = bind_rotation.inverted() @ rotation
+                obj.pose.bones[node_state.blender_bone_name].scale = bind_scale.inverted() @ scale
 
     @staticmethod
-    def create_bone(gltf, skin_id, node_id, parent):
-        """Bone creation."""
-        pyskin = gltf.data.skins[skin_id]
-        pynode = gltf.data.nodes[node_id]
+    def create_bones(gltf, skin_id):
+        """Create all bones of the armature, in a single edit mode session."""
+        skin_state = gltf.skin_states[skin_id]
 
         scene = bpy.data.scenes[gltf.blender_scene]
-        obj = bpy.data.objects[pyskin.blender_armature_name]
+        obj = bpy.data.objects[skin_state.blender_armature_name]
+
+        parents = gltf.node_parents
+        joints = BlenderSkin.get_joints_in_hierarchy_order(gltf, skin_id, parents)
+        bind_matrices = BlenderSkin.get_bind_matrices(gltf, skin_id, joints)
 
         if bpy.app.version < (2, 80, 0):
             bpy.context.screen.scene = scene
@@ -145,105 +166,210 @@ class BlenderSkin():
             bpy.context.view_layer.objects.active = obj
         bpy.ops.object.mode_set(mode="EDIT")
 
-        if pynode.name:
-            name = pynode.name
-        else:
-            name = "Bone_" + str(node_id)
+        bone_parents = []
+        bone_indices = {}
+        for node_id in joints:
+            pynode = gltf.data.nodes[node_id]
+            node_state = gltf.node_states[node_id]
 
-        bone = obj.data.edit_bones.new(name)
-        pynode.blender_bone_name = bone.name
-        pynode.blender_armature_name = pyskin.blender_armature_name
-        bone.tail = Vector((0.0, 1.0, 0.0))  # Needed to keep bone alive
+            if pynode.name:
+                name = pynode.name
+            else:
+                name = "Bone_" + str(node_id)
+
+            bone = obj.data.edit_bones.new(name)
+            node_state.blender_bone_name = bone.name
+            node_state.blender_armature_name = skin_state.blender_armature_name
+            bone.tail = Vector((0.0, 1.0, 0.0))  # Needed to keep bone alive
+
+            # Set bone bind_pose by inverting bindpose matrix
+            node_state.blender_bone_matrix = bind_matrices[node_id]
+            bone.matrix = node_state.blender_bone_matrix
+
+            # Parent the bone
+            parent = parents.get(node_id)
+            if parent is not None and parent in bind_matrices:
+                bone.parent = obj.data.edit_bones[gltf.node_states[parent].blender_bone_name]
+                bone_parents.append(bone_indices[parent])
+            else:
+                bone_parents.append(-1)
+            bone_indices[node_id] = len(bone_indices)
+
+        BlenderSkin.fix_bone_chains(obj.data.edit_bones, np.array(bone_parents, dtype=np.int64))
 
-        # set bind and pose transforms
-        BlenderSkin.set_bone_transforms(gltf, skin_id, bone, node_id, parent)
         bpy.ops.object.mode_set(mode="OBJECT")
 
+        # set pose transforms
+        obj.data.pose_position = 'POSE'
+        for node_id in joints:
+            BlenderSkin.set_bone_transforms(gltf, skin_id, node_id, parents.get(node_id))
+
+        # Keep armature space pose matrices, to parent objects to bones without updating the depsgraph
+        for node_id in joints:
+            node_state = gltf.node_states[node_id]
+            node_state.blender_bone_pose_matrix = BlenderSkin.get_pose_matrix(obj, node_state.blender_bone_name)
+
+    @staticmethod
+    def get_pose_matrix(obj, bone_name):
+        """Compute armature space pose matrix of a bone from its bone chain, as pose evaluation would."""
+        bone = obj.data.bones[bone_name]
+        matrix = obj.pose.bones[bone_name].matrix_basis.copy()
+        while bone.parent is not None:
+            if bpy.app.version < (2, 80, 0):
+                matrix = bone.parent.matrix_local.inverted() * bone.matrix_local * matrix
+                matrix = obj.pose.bones[bone.parent.name].matrix_basis * matrix
+            else:
+                matrix = bone.parent.matrix_local.inverted() @ bone.matrix_local @ matrix
+                matrix = obj.pose.bones[bone.parent.name].matrix_basis @ matrix
+            bone = bone.parent
+
+        if bpy.app.version < (2, 80, 0):
+            return bone.matrix_local * matrix
+        else:
+            return bone.matrix_local @ matrix
+
+    @staticmethod
+    def fix_bone_chains(edit_bones, bone_parents, threshold=0.001):
+        """Try to detect bone chains, and set bone lengths.
+
+        To detect if a bone is in a chain, we try to detect if a bone head is aligned
+        with parent_bone :
+                 Parent bone defined a line (between head & tail)
+                 Bone head defined a point
+                 Calcul of distance between point and line
+                 If < threshold --> In a chain
+        Based on an idea of @Menithal, but added alignement detection to avoid some bad cases
+        """
+        heads = np.empty((len(edit_bones), 3), dtype=np.float32)
+        tails = np.empty((len(edit_bones), 3), dtype=np.float32)
+        edit_bones.foreach_get('head', heads.reshape(-1))
+        edit_bones.foreach_get('tail', tails.reshape(-1))
+
+        children = np.flatnonzero(bone_parents >= 0)
+        if len(children) == 0:
+            return
+        parents = bone_parents[children]
+
+        # A moved tail changes the parent direction seen by next children of the same parent:
+        # children are processed by rank among their siblings, in bone order, as a sequential loop would do
+        order = np.argsort(parents, kind='stable')
+        sorted_parents = parents[order]
+        group_starts = np.flatnonzero(np.concatenate(([True], sorted_parents[1:] != sorted_parents[:-1])))
+        group_sizes = np.diff(np.append(group_starts, len(order)))
+        ranks = np.empty(len(order), dtype=np.int64)
+        ranks[order] = np.arange(len(order)) - np.repeat(group_starts, group_sizes)
+
+        moved = np.zeros(len(edit_bones), dtype=bool)
+        for rank in range(ranks.max() + 1):
+            rank_children = children[ranks == rank]
+            rank_parents = parents[ranks == rank]
+
+            offsets = heads[rank_children] - heads[rank_parents]
+            offset_lengths = np.linalg.norm(offsets, axis=1)
+            directions = tails[rank_parents] - heads[rank_parents]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                directions /= np.linalg.norm(directions, axis=1)[:, np.newaxis]
+                distances = np.linalg.norm(np.cross(offsets, directions), axis=1)
+                alignments = np.einsum('ij,ij->i', offsets, directions) / offset_lengths
+
+            # 2 bones with same head are not in chain,
+            # and parent tail is moved only if parent bone stays in same direction
+            in_chain = (offset_lengths >= threshold) & (distances < threshold) & (alignments >= 0.9)
+            tails[rank_parents[in_chain]] = heads[rank_children[in_chain]]
+            moved[rank_parents[in_chain]] = True
+
+        for bone_idx in np.flatnonzero(moved).tolist():
+            edit_bones[bone_idx].tail = tails[bone_idx].tolist()
+
     @staticmethod
     def create_vertex_groups(gltf, skin_id):
         """Vertex Group creation."""
         pyskin = gltf.data.skins[skin_id]
-        for node_id in pyskin.node_ids:
-            obj = bpy.data.objects[gltf.data.nodes[node_id].blender_object]
+        for node_id in gltf.skin_states[skin_id].node_ids:
+            obj = bpy.data.objects[gltf.node_states[node_id].blender_object]
             for bone in pyskin.joints:
-                obj.vertex_groups.new(name=gltf.data.nodes[bone].blender_bone_name)
+                obj.vertex_groups.new(name=gltf.node_states[bone].blender_bone_name)
 
     @staticmethod
     def assign_vertex_groups(gltf, skin_id):
         """Assign vertex groups to vertices."""
         pyskin = gltf.data.skins[skin_id]
-        for node_id in pyskin.node_ids:
+        for node_id in gltf.skin_states[skin_id].node_ids:
             node = gltf.data.nodes[node_id]
-            obj = bpy.data.objects[node.blender_object]
+            obj = bpy.data.objects[gltf.node_states[node_id].blender_object]
 
-            offset = 0
-            for prim in gltf.data.meshes[node.mesh].primitives:
-                idx_already_done = {}
+            groups = [obj.vertex_groups[gltf.node_states[joint].blender_bone_name] for joint in pyskin.joints]
 
+            # Collect all (vertex, joint, weight) influences of the mesh, JOINTS_n / WEIGHTS_n sets included
+            vert_idxs = []
+            joint_idxs = []
+            weights = []
+            offset = 0
+            for prim, prim_state in zip(gltf.data.meshes[node.mesh].primitives, gltf.mesh_states[node.mesh].primitives):
                 if 'JOINTS_0' in prim.attributes.keys() and 'WEIGHTS_0' in prim.attributes.keys():
-                    original_joint_ = BinaryData.get_data_from_accessor(gltf, prim.attributes['JOINTS_0'])
-                    original_weight_ = BinaryData.get_data_from_accessor(gltf, prim.attributes['WEIGHTS_0'])
-
-                    tmp_indices = {}
-                    tmp_idx = 0
-                    weight_ = []
-                    for i in prim.tmp_indices:
-                        if i[0] not in tmp_indices.keys():
-                            tmp_indices[i[0]] = tmp_idx
-                            tmp_idx += 1
-                            weight_.append(original_weight_[i[0]])
-
-                    tmp_indices = {}
-                    tmp_idx = 0
-                    joint_ = []
-                    for i in prim.tmp_indices:
-                        if i[0] not in tmp_indices.keys():
-                            tmp_indices[i[0]] = tmp_idx
-                            tmp_idx += 1
-                            joint_.append(original_joint_[i[0]])
-
-
-                    for poly in obj.data.polygons:
-                        for loop_idx in range(poly.loop_start, poly.loop_start + poly.loop_total):
-                            vert_idx = obj.data.loops[loop_idx].vertex_index
-
-                            if vert_idx in idx_already_done.keys():
-                                continue
-                            idx_already_done[vert_idx] = True
-
-                            if vert_idx in range(offset, offset + prim.vertices_length):
-
-                                tab_index = vert_idx - offset
-                                cpt = 0
-                                for joint_idx in joint_[tab_index]:
-                                    weight_val = weight_[tab_index][cpt]
-                                    if weight_val != 0.0:   # It can be a problem to assign weights of 0
-                                                            # for bone index 0, if there is always 4 indices in joint_
-                                                            # tuple
-                                        group = obj.vertex_groups[gltf.data.nodes[
-                                            pyskin.joints[joint_idx]
-                                        ].blender_bone_name]
-                                        group.add([vert_idx], weight_val, 'REPLACE')
-                                    cpt += 1
+                    prim_vert_idxs = np.arange(offset, offset + prim_state.vertices_length)
+                    set_idx = 0
+                    while 'JOINTS_' + str(set_idx) in prim.attributes.keys() \
+                            and 'WEIGHTS_' + str(set_idx) in prim.attributes.keys():
+                        joint_ = BinaryData.decode_accessor(gltf, prim.attributes['JOINTS_' + str(set_idx)])
+                        joint_ = joint_[prim_state.vertex_remap]
+                        weight_ = BinaryData.decode_accessor(gltf, prim.attributes['WEIGHTS_' + str(set_idx)])
+                        weight_ = weight_[prim_state.vertex_remap]
+
+                        vert_idxs.append(np.repeat(prim_vert_idxs, joint_.shape[1]))
+                        joint_idxs.append(joint_.reshape(-1))
+                        weights.append(weight_.reshape(-1))
+                        set_idx += 1
                 else:
                     gltf.log.error("No Skinning ?????")  # TODO
 
-                offset = offset + prim.vertices_length
+                offset = offset + prim_state.vertices_length
+
+            if not vert_idxs:
+                continue
+
+            vert_idxs = np.concatenate(vert_idxs)
+            joint_idxs = np.concatenate(joint_idxs).astype(np.int64)
+            weights = np.concatenate(weights).astype(np.float32)
+
+            # Quantize weights to 1/65535 (exact for normalized unsigned byte and short weights),
+            # so that float weights that are almost equal share a bucket below
+            weights = (np.round(weights * 65535.0) / 65535.0).astype(np.float32)
+
+            # It can be a problem to assign weights of 0 for bone index 0,
+            # if there is always 4 indices in joint_ tuple
+            used = weights != 0.0
+            vert_idxs, joint_idxs, weights = vert_idxs[used], joint_idxs[used], weights[used]
+            if len(weights) == 0:
+                continue
+
+            # If a vertex uses the same joint several times, the last influence wins (as 'REPLACE' did)
+            _, last = np.unique((vert_idxs * len(groups) + joint_idxs)[::-1], return_index=True)
+            last = len(weights) - 1 - last
+            vert_idxs, joint_idxs, weights = vert_idxs[last], joint_idxs[last], weights[last]
+
+            # One vertex group call per distinct (joint, weight) bucket
+            order = np.lexsort((weights, joint_idxs))
+            vert_idxs, joint_idxs, weights = vert_idxs[order], joint_idxs[order], weights[order]
+            bounds = np.flatnonzero((np.diff(joint_idxs) != 0) | (np.diff(weights) != 0)) + 1
+            starts = [0] + bounds.tolist()
+            ends = bounds.tolist() + [len(weights)]
+            for start, end in zip(starts, ends):
+                groups[joint_idxs[start]].add(vert_idxs[start:end].tolist(), float(weights[start]), 'REPLACE')
 
     @staticmethod
     def create_armature_modifiers(gltf, skin_id):
         """Create Armature modifier."""
-        pyskin = gltf.data.skins[skin_id]
+        skin_state = gltf.skin_states[skin_id]
 
-        if pyskin.blender_armature_name is None:
+        if skin_state.blender_armature_name is None:
             # TODO seems something is wrong
             # For example, some joints are in skin 0, and are in another skin too
             # Not sure this is glTF compliant, will check it
             return
 
-        for node_id in pyskin.node_ids:
-            node = gltf.data.nodes[node_id]
-            obj = bpy.data.objects[node.blender_object]
+        for node_id in skin_state.node_ids:
+            obj = bpy.data.objects[gltf.node_states[node_id].blender_object]
 
             if bpy.app.version < (2, 80, 0):
                 for obj_sel in bpy.context.scene.objects:
@@ -259,6 +385,6 @@ class BlenderSkin():
             # bpy.ops.object.parent_clear(type='CLEAR_KEEP_TRANSFORM')
             # Reparent skinned mesh to it's armature to avoid breaking
             # skinning with interleaved transforms
-            obj.parent = bpy.data.objects[pyskin.blender_armature_name]
+            obj.parent = bpy.data.objects[skin_state.blender_armature_name]
             arma = obj.modifiers.new(name="Armature", type="ARMATURE")
-            arma.object = bpy.data.objects[pyskin.blender_armature_name]
+            arma.object = bpy.data.objects[skin_state.blender_armature_name]
@@ -16,7 +16,7 @@
 # command used:
 # quicktype --src glTF.schema.json --src-lang schema -t gltf --lang python --python-version 3.5
 
-# TODO: add __slots__ to all classes by extending the generator
+# NOTE: __slots__ were added to all classes, from __init__ parameters
 
 # TODO: REMOVE traceback import
 import sys
@@ -94,6 +94,8 @@ class AccessorSparseIndices:
     Indices of those attributes that deviate from their initialization value.
     """
 
+    __slots__ = ('buffer_view', 'byte_offset', 'component_type', 'extensions', 'extras')
+
     def __init__(self, buffer_view, byte_offset, component_type, extensions, extras):
         self.buffer_view = buffer_view
         self.byte_offset = byte_offset
@@ -132,6 +134,8 @@ class AccessorSparseValues:
     accessor attributes pointed by `accessor.sparse.indices`.
     """
 
+    __slots__ = ('buffer_view', 'byte_offset', 'extensions', 'extras')
+
     def __init__(self, buffer_view, byte_offset, extensions, extras):
         self.buffer_view = buffer_view
         self.byte_offset = byte_offset
@@ -161,6 +165,8 @@ class AccessorSparseValues:
 class AccessorSparse:
     """Sparse storage of attributes that deviate from their initialization value."""
 
+    __slots__ = ('count', 'extensions', 'extras', 'indices', 'values')
+
     def __init__(self, count, extensions, extras, indices, values):
         self.count = count
         self.extensions = extensions
@@ -196,6 +202,9 @@ class Accessor:
     WebGL's `vertexAttribPointer()` defines an attribute in a buffer.
     """
 
+    __slots__ = ('buffer_view', 'byte_offset', 'component_type', 'count', 'extensions', 'extras', 'max', 'min', 'name',
+                 'normalized', 'sparse', 'type')
+
     def __init__(self, buffer_view, byte_offset, component_type, count, extensions, extras, max, min, name, normalized,
                  sparse, type):
         self.buffer_view = buffer_view
@@ -254,6 +263,8 @@ class AnimationChannelTarget:
     The index of the node and TRS property that an animation channel targets.
     """
 
+    __slots__ = ('extensions', 'extras', 'node', 'path')
+
     def __init__(self, extensions, extras, node, path):
         self.extensions = extensions
         self.extras = extras
@@ -283,6 +294,8 @@ class AnimationChannelTarget:
 class AnimationChannel:
     """Targets an animation's sampler at a node's property."""
 
+    __slots__ = ('extensions', 'extras', 'sampler', 'target')
+
     def __init__(self, extensions, extras, sampler, target):
         self.extensions = extensions
         self.extras = extras
@@ -314,6 +327,8 @@ class AnimationSampler:
     graph (but not its target).
     """
 
+    __slots__ = ('extensions', 'extras', 'input', 'interpolation', 'output')
+
     def __init__(self, extensions, extras, input, interpolation, output):
         self.extensions = extensions
         self.extras = extras
@@ -346,6 +361,8 @@ class AnimationSampler:
 class Animation:
     """A keyframe animation."""
 
+    __slots__ = ('channels', 'extensions', 'extras', 'name', 'samplers')
+
     def __init__(self, channels, extensions, extras, name, samplers):
         self.channels = channels
         self.extensions = extensions
@@ -378,6 +395,8 @@ class Animation:
 class Asset:
     """Metadata about the glTF asset."""
 
+    __slots__ = ('copyright', 'extensions', 'extras', 'generator', 'min_version', 'version')
+
     def __init__(self, copyright, extensions, extras, generator, min_version, version):
         self.copyright = copyright
         self.extensions = extensions
@@ -413,6 +432,8 @@ class Asset:
 class BufferView:
     """A view into a buffer generally representing a subset of the buffer."""
 
+    __slots__ = ('buffer', 'byte_length', 'byte_offset', 'byte_stride', 'extensions', 'extras', 'name', 'target')
+
     def __init__(self, buffer, byte_length, byte_offset, byte_stride, extensions, extras, name, target):
         self.buffer = buffer
         self.byte_length = byte_length
@@ -454,6 +475,8 @@ class BufferView:
 class Buffer:
     """A buffer points to binary geometry, animation, or skins."""
 
+    __slots__ = ('byte_length', 'extensions', 'extras', 'name', 'uri')
+
     def __init__(self, byte_length, extensions, extras, name, uri):
         self.byte_length = byte_length
         self.extensions = extensions
@@ -486,6 +509,8 @@ class Buffer:
 class CameraOrthographic:
     """An orthographic camera containing properties to create an orthographic projection matrix."""
 
+    __slots__ = ('extensions', 'extras', 'xmag', 'ymag', 'zfar', 'znear')
+
     def __init__(self, extensions, extras, xmag, ymag, zfar, znear):
         self.extensions = extensions
         self.extras = extras
@@ -521,6 +546,8 @@ class CameraOrthographic:
 class CameraPerspective:
     """A perspective camera containing properties to create a perspective projection matrix."""
 
+    __slots__ = ('aspect_ratio', 'extensions', 'extras', 'yfov', 'zfar', 'znear')
+
     def __init__(self, aspect_ratio, extensions, extras, yfov, zfar, znear):
         self.aspect_ratio = aspect_ratio
         self.extensions = extensions
@@ -558,6 +585,8 @@ class Camera:
     camera in the scene.
     """
 
+    __slots__ = ('extensions', 'extras', 'name', 'orthographic', 'perspective', 'type')
+
     def __init__(self, extensions, extras, name, orthographic, perspective, type):
         self.extensions = extensions
         self.extras = extras
@@ -595,6 +624,8 @@ class Image:
     index. `mimeType` is required in the latter case.
     """
 
+    __slots__ = ('buffer_view', 'extensions', 'extras', 'mime_type', 'name', 'uri')
+
     def __init__(self, buffer_view, extensions, extras, mime_type, name, uri):
         self.buffer_view = buffer_view
         self.extensions = extensions
@@ -637,6 +668,8 @@ class TextureInfo:
     Reference to a texture.
     """
 
+    __slots__ = ('extensions', 'extras', 'index', 'tex_coord')
+
     def __init__(self, extensions, extras, index, tex_coord):
         self.extensions = extensions
         self.extras = extras
@@ -669,6 +702,8 @@ class MaterialNormalTextureInfoClass:
     Reference to a texture.
     """
 
+    __slots__ = ('extensions', 'extras', 'index', 'scale', 'tex_coord')
+
     def __init__(self, extensions, extras, index, scale, tex_coord):
         self.extensions = extensions
         self.extras = extras
@@ -704,6 +739,8 @@ class MaterialOcclusionTextureInfoClass:
     Reference to a texture.
     """
 
+    __slots__ = ('extensions', 'extras', 'index', 'strength', 'tex_coord')
+
     def __init__(self, extensions, extras, index, strength, tex_coord):
         self.extensions = extensions
         self.extras = extras
@@ -742,6 +779,9 @@ class MaterialPBRMetallicRoughness:
     from Physically-Based Rendering (PBR) methodology.
     """
 
+    __slots__ = ('base_color_factor', 'base_color_texture', 'extensions', 'extras', 'metallic_factor',
+                 'metallic_roughness_texture', 'roughness_factor')
+
     def __init__(self, base_color_factor, base_color_texture, extensions, extras, metallic_factor,
                  metallic_roughness_texture, roughness_factor):
         self.base_color_factor = base_color_factor
@@ -784,6 +824,9 @@ class MaterialPBRMetallicRoughness:
 class Material:
     """The material appearance of a primitive."""
 
+    __slots__ = ('alpha_cutoff', 'alpha_mode', 'double_sided', 'emissive_factor', 'emissive_texture', 'extensions',
+                 'extras', 'name', 'normal_texture', 'occlusion_texture', 'pbr_metallic_roughness')
+
     def __init__(self, alpha_cutoff, alpha_mode, double_sided, emissive_factor, emissive_texture, extensions, extras,
                  name, normal_texture, occlusion_texture, pbr_metallic_roughness):
         self.alpha_cutoff = alpha_cutoff
@@ -841,6 +884,8 @@ class Material:
 class MeshPrimitive:
     """Geometry to be rendered with the given material."""
 
+    __slots__ = ('attributes', 'extensions', 'extras', 'indices', 'material', 'mode', 'targets')
+
     def __init__(self, attributes, extensions, extras, indices, material, mode, targets):
         self.attributes = attributes
         self.extensions = extensions
@@ -882,6 +927,8 @@ class Mesh:
     places the mesh in the scene.
     """
 
+    __slots__ = ('extensions', 'extras', 'name', 'primitives', 'weights')
+
     def __init__(self, extensions, extras, name, primitives, weights):
         self.extensions = extensions
         self.extras = extras
@@ -922,6 +969,9 @@ class Node:
     may be present; `matrix` will not be present.
     """
 
+    __slots__ = ('camera', 'children', 'extensions', 'extras', 'matrix', 'mesh', 'name', 'rotation', 'scale', 'skin',
+                 'translation', 'weights')
+
     def __init__(self, camera, children, extensions, extras, matrix, mesh, name, rotation, scale, skin, translation,
                  weights):
         self.camera = camera
@@ -977,6 +1027,8 @@ class Node:
 class Sampler:
     """Texture sampler properties for filtering and wrapping modes."""
 
+    __slots__ = ('extensions', 'extras', 'mag_filter', 'min_filter', 'name', 'wrap_s', 'wrap_t')
+
     def __init__(self, extensions, extras, mag_filter, min_filter, name, wrap_s, wrap_t):
         self.extensions = extensions
         self.extras = extras
@@ -1015,6 +1067,8 @@ class Sampler:
 class Scene:
     """The root nodes of a scene."""
 
+    __slots__ = ('extensions', 'extras', 'name', 'nodes')
+
     def __init__(self, extensions, extras, name, nodes):
         self.extensions = extensions
         self.extras = extras
@@ -1044,6 +1098,8 @@ class Scene:
 class Skin:
     """Joints and matrices defining a skin."""
 
+    __slots__ = ('extensions', 'extras', 'inverse_bind_matrices', 'joints', 'name', 'skeleton')
+
     def __init__(self, extensions, extras, inverse_bind_matrices, joints, name, skeleton):
         self.extensions = extensions
         self.extras = extras
@@ -1079,6 +1135,8 @@ class Skin:
 class Texture:
     """A texture and its sampler."""
 
+    __slots__ = ('extensions', 'extras', 'name', 'sampler', 'source')
+
     def __init__(self, extensions, extras, name, sampler, source):
         self.extensions = extensions
         self.extras = extras
@@ -1111,6 +1169,10 @@ class Texture:
 class Gltf:
     """The root object for a glTF asset."""
 
+    __slots__ = ('accessors', 'animations', 'asset', 'buffers', 'buffer_views', 'cameras', 'extensions',
+                 'extensions_required', 'extensions_used', 'extras', 'images', 'materials', 'meshes', 'nodes',
+                 'samplers', 'scene', 'scenes', 'skins', 'textures')
+
     def __init__(self, accessors, animations, asset, buffers, buffer_views, cameras, extensions, extensions_required,
                  extensions_used, extras, images, materials, meshes, nodes, samplers, scene, scenes, skins, textures):
         self.accessors = accessors
@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import numpy as np
+
 
 def color_srgb_to_scene_linear(c):
     """
@@ -34,3 +36,21 @@ def color_linear_to_srgb(c):
         return 0.0 if c < 0.0 else c * 12.92
     else:
         return 1.055 * pow(c, 1.0 / 2.4) - 0.055
+
+def color_srgb_to_scene_linear_array(a):
+    """Convert an array of colors from sRGB to scene linear color space, see color_srgb_to_scene_linear."""
+    a = np.asarray(a, dtype=np.float32)
+    return np.where(
+        a < 0.04045,
+        np.where(a < 0.0, 0.0, a * (1.0 / 12.92)),
+        np.power((np.maximum(a, 0.04045) + 0.055) * (1.0 / 1.055), 2.4)
+    ).astype(np.float32)
+
+def color_linear_to_srgb_array(a):
+    """Convert an array of colors from linear to sRGB color space, see color_linear_to_srgb."""
+    a = np.asarray(a, dtype=np.float32)
+    return np.where(
+        a < 0.0031308,
+        np.where(a < 0.0, 0.0, a * 12.92),
+        1.055 * np.power(np.maximum(a, 0.0031308), 1.0 / 2.4) - 0.055
+    ).astype(np.float32)
@@ -0,0 +1,425 @@
+# Copyright 2019 The glTF-Blender-IO authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Fast glTF JSON decoder.
+#
+# Decoding functions of gltf2_io classes are generated from the field tables below, with direct type checks
+# and no exceptions while data is valid. When data is not valid, decoding is done again with
+# gltf2_io.gltf_from_dict, that reports errors.
+
+from io_scene_gltf2.io.com import gltf2_io
+
+
+class InvalidData(Exception):
+    """Raised by generated decoders when data doesn't match the schema."""
+    pass
+
+
+# Field tables, in constructor parameter order: (parameter, json key, kind, required)
+# kind is a value kind, or a (kind, class name) tuple for objects.
+EXTENSIONS = ('extensions', 'extensions', 'extensions', False)
+EXTRAS = ('extras', 'extras', 'any', False)
+
+FIELDS = {
+    'AccessorSparseIndices': [
+        ('buffer_view', 'bufferView', 'int', True),
+        ('byte_offset', 'byteOffset', 'int', False),
+        ('component_type', 'componentType', 'int', True),
+        EXTENSIONS,
+        EXTRAS,
+    ],
+    'AccessorSparseValues': [
+        ('buffer_view', 'bufferView', 'int', True),
+        ('byte_offset', 'byteOffset', 'int', False),
+        EXTENSIONS,
+        EXTRAS,
+    ],
+    'AccessorSparse': [
+        ('count', 'count', 'int', True),
+        EXTENSIONS,
+        EXTRAS,
+        ('indices', 'indices', ('object', 'AccessorSparseIndices'), True),
+        ('values', 'values', ('object', 'AccessorSparseValues'), True),
+    ],
+    'Accessor': [
+        ('buffer_view', 'bufferView', 'int', False),
+        ('byte_offset', 'byteOffset', 'int', False),
+        ('component_type', 'componentType', 'int', True),
+        ('count', 'count', 'int', True),
+        EXTENSIONS,
+        EXTRAS,
+        ('max', 'max', 'float_list', False),
+        ('min', 'min', 'float_list', False),
+        ('name', 'name', 'str', False),
+        ('normalized', 'normalized', 'bool', False),
+        ('sparse', 'sparse', ('object', 'AccessorSparse'), False),
+        ('type', 'type', 'str', True),
+    ],
+    'AnimationChannelTarget': [
+        EXTENSIONS,
+        EXTRAS,
+        ('node', 'node', 'int', False),
+        ('path', 'path', 'str', True),
+    ],
+    'AnimationChannel': [
+        EXTENSIONS,
+        EXTRAS,
+        ('sampler', 'sampler', 'int', True),
+        ('target', 'target', ('object', 'AnimationChannelTarget'), True),
+    ],
+    'AnimationSampler': [
+        EXTENSIONS,
+        EXTRAS,
+        ('input', 'input', 'int', True),
+        ('interpolation', 'interpolation', 'str', False),
+        ('output', 'output', 'int', True),
+    ],
+    'Animation': [
+        ('channels', 'channels', ('object_list', 'AnimationChannel'), True),
+        EXTENSIONS,
+        EXTRAS,
+        ('name', 'name', 'str', False),
+        ('samplers', 'samplers', ('object_list', 'AnimationSampler'), True),
+    ],
+    'Asset': [
+        ('copyright', 'copyright', 'str', False),
+        EXTENSIONS,
+        EXTRAS,
+        ('generator', 'generator', 'str', False),
+        ('min_version', 'minVersion', 'str', False),
+        ('version', 'version', 'str', True),
+    ],
+    'BufferView': [
+        ('buffer', 'buffer', 'int', True),
+        ('byte_length', 'byteLength', 'int', True),
+        ('byte_offset', 'byteOffset', 'int', False),
+        ('byte_stride', 'byteStride', 'int', False),
+        EXTENSIONS,
+        EXTRAS,
+        ('name', 'name', 'str', False),
+        ('target', 'target', 'int', False),
+    ],
+    'Buffer': [
+        ('byte_length', 'byteLength', 'int', True),
+        EXTENSIONS,
+        EXTRAS,
+        ('name', 'name', 'str', False),
+        ('uri', 'uri', 'str', False),
+    ],
+    'CameraOrthographic': [
+        EXTENSIONS,
+        EXTRAS,
+        ('xmag', 'xmag', 'float', True),
+        ('ymag', 'ymag', 'float', True),
+        ('zfar', 'zfar', 'float', True),
+        ('znear', 'znear', 'float', True),
+    ],
+    'CameraPerspective': [
+        ('aspect_ratio', 'aspectRatio', 'float', False),
+        EXTENSIONS,
+        EXTRAS,
+        ('yfov', 'yfov', 'float', True),
+        ('zfar', 'zfar', 'float', False),
+        ('znear', 'znear', 'float', True),
+    ],
+    'Camera': [
+        EXTENSIONS,
+        EXTRAS,
+        ('name', 'name', 'str', False),
+        ('orthographic', 'orthographic', ('object', 'CameraOrthographic'), False),
+        ('perspective', 'perspective', ('object', 'CameraPerspective'), False),
+        ('type', 'type', 'str', True),
+    ],
+    'Image': [
+        ('buffer_view', 'bufferView', 'int', False),
+        EXTENSIONS,
+        EXTRAS,
+        ('mime_type', 'mimeType', 'str', False),
+        ('name', 'name', 'str', False),
+        ('uri', 'uri', 'str', False),
+    ],
+    'TextureInfo': [
+        EXTENSIONS,
+        EXTRAS,
+        ('index', 'index', 'int', True),
+        ('tex_coord', 'texCoord', 'int', False),
+    ],
+    'MaterialNormalTextureInfoClass': [
+        EXTENSIONS,
+        EXTRAS,
+        ('index', 'index', 'int', True),
+        ('scale', 'scale', 'float', False),
+        ('tex_coord', 'texCoord', 'int', False),
+    ],
+    'MaterialOcclusionTextureInfoClass': [
+        EXTENSIONS,
+        EXTRAS,
+        ('index', 'index', 'int', True),
+        ('strength', 'strength', 'float', False),
+        ('tex_coord', 'texCoord', 'int', False),
+    ],
+    'MaterialPBRMetallicRoughness': [
+        ('base_color_factor', 'baseColorFactor', 'float_list', False),
+        ('base_color_texture', 'baseColorTexture', ('object', 'TextureInfo'), False),
+        EXTENSIONS,
+        EXTRAS,
+        ('metallic_factor', 'metallicFactor', 'float', False),
+        ('metallic_roughness_texture', 'metallicRoughnessTexture', ('object', 'TextureInfo'), False),
+        ('roughness_factor', 'roughnessFactor', 'float', False),
+    ],
+    'Material': [
+        ('alpha_cutoff', 'alphaCutoff', 'float', False),
+        ('alpha_mode', 'alphaMode', 'str', False),
+        ('double_sided', 'doubleSided', 'bool', False),
+        ('emissive_factor', 'emissiveFactor', 'float_list', False),
+        ('emissive_texture', 'emissiveTexture', ('object', 'TextureInfo'), False),
+        EXTENSIONS,
+        EXTRAS,
+        ('name', 'name', 'str', False),
+        ('normal_texture', 'normalTexture', ('object', 'MaterialNormalTextureInfoClass'), False),
+        ('occlusion_texture', 'occlusionTexture', ('object', 'MaterialOcclusionTextureInfoClass'), False),
+        ('pbr_metallic_roughness', 'pbrMetallicRoughness', ('object', 'MaterialPBRMetallicRoughness'), False),
+    ],
+    'MeshPrimitive': [
+        ('attributes', 'attributes', 'int_dict', True),
+        EXTENSIONS,
+        EXTRAS,
+        ('indices', 'indices', 'int', False),
+        ('material', 'material', 'int', False),
+        ('mode', 'mode', 'int', False),
+        ('targets', 'targets', 'int_dict_list', False),
+    ],
+    'Mesh': [
+        EXTENSIONS,
+        EXTRAS,
+        ('name', 'name', 'str', False),
+        ('primitives', 'primitives', ('object_list', 'MeshPrimitive'), True),
+        ('weights', 'weights', 'float_list', False),
+    ],
+    'Node': [
+        ('camera', 'camera', 'int', False),
+        ('children', 'children', 'int_list', False),
+        EXTENSIONS,
+        EXTRAS,
+        ('matrix', 'matrix', 'float_list', False),
+        ('mesh', 'mesh', 'int', False),
+        ('name', 'name', 'str', False),
+        ('rotation', 'rotation', 'float_list', False),
+        ('scale', 'scale', 'float_list', False),
+        ('skin', 'skin', 'int', False),
+        ('translation', 'translation', 'float_list', False),
+        ('weights', 'weights', 'float_list', False),
+    ],
+    'Sampler': [
+        EXTENSIONS,
+        EXTRAS,
+        ('mag_filter', 'magFilter', 'int', False),
+        ('min_filter', 'minFilter', 'int', False),
+        ('name', 'name', 'str', False),
+        ('wrap_s', 'wrapS', 'int', False),
+        ('wrap_t', 'wrapT', 'int', False),
+    ],
+    'Scene': [
+        EXTENSIONS,
+        EXTRAS,
+        ('name', 'name', 'str', False),
+        ('nodes', 'nodes', 'int_list', False),
+    ],
+    'Skin': [
+        EXTENSIONS,
+        EXTRAS,
+        ('inverse_bind_matrices', 'inverseBindMatrices', 'int', False),
+        ('joints', 'joints', 'int_list', True),
+        ('name', 'name', 'str', False),
+        ('skeleton', 'skeleton', 'int', False),
+    ],
+    'Texture': [
+        EXTENSIONS,
+        EXTRAS,
+        ('name', 'name', 'str', False),
+        ('sampler', 'sampler', 'int', False),
+        ('source', 'source', 'int', True),
+    ],
+    'Gltf': [
+        ('accessors', 'accessors', ('object_list', 'Accessor'), False),
+        ('animations', 'animations', ('object_list', 'Animation'), False),
+        ('asset', 'asset', ('object', 'Asset'), True),
+        ('buffers', 'buffers', ('object_list', 'Buffer'), False),
+        ('buffer_views', 'bufferViews', ('object_list', 'BufferView'), False),
+        ('cameras', 'cameras', ('object_list', 'Camera'), False),
+        EXTENSIONS,
+        ('extensions_required', 'extensionsRequired', 'str_list', False),
+        ('extensions_used', 'extensionsUsed', 'str_list', False),
+        EXTRAS,
+        ('images', 'images', ('object_list', 'Image'), False),
+        ('materials', 'materials', ('object_list', 'Material'), False),
+        ('meshes', 'meshes', ('object_list', 'Mesh'), False),
+        ('nodes', 'nodes', ('object_list', 'Node'), False),
+        ('samplers', 'samplers', ('object_list', 'Sampler'), False),
+        ('scene', 'scene', 'int', False),
+        ('scenes', 'scenes', ('object_list', 'Scene'), False),
+        ('skins', 'skins', ('object_list', 'Skin'), False),
+        ('textures', 'textures', ('object_list', 'Texture'), False),
+    ],
+}
+
+
+def decode_extensions(x):
+    if type(x) is not dict:
+        raise InvalidData
+    result = {}
+    for key, value in x.items():
+        if type(value) is not dict:
+            raise InvalidData
+        result[key] = dict(value)
+    return result
+
+
+def decode_int_list(x):
+    if type(x) is not list:
+        raise InvalidData
+    for y in x:
+        if type(y) is not int:
+            raise InvalidData
+    return list(x)
+
+
+def decode_float_list(x):
+    if type(x) is not list:
+        raise InvalidData
+    for y in x:
+        if type(y) is not float and type(y) is not int:
+            raise InvalidData
+    return [float(y) for y in x]
+
+
+def decode_str_list(x):
+    if type(x) is not list:
+        raise InvalidData
+    for y in x:
+        if type(y) is not str:
+            raise InvalidData
+    return list(x)
+
+
+def decode_int_dict(x):
+    if type(x) is not dict:
+        raise InvalidData
+    for y in x.values():
+        if type(y) is not int:
+            raise InvalidData
+    return dict(x)
+
+
+def decode_int_dict_list(x):
+    if type(x) is not list:
+        raise InvalidData
+    return [decode_int_dict(y) for y in x]
+
+
+# Checks of a value, by kind. {v} is the variable holding the value, that is not None for optional fields.
+# Note that type(x) is int is False for booleans, as gltf2_io expects.
+VALUE_CHECKS = {
+    'int': [
+        "if type({v}) is not int:",
+        "    raise InvalidData",
+    ],
+    'float': [
+        "if type({v}) is int:",
+        "    {v} = float({v})",
+        "elif type({v}) is not float:",
+        "    raise InvalidData",
+    ],
+    'str': [
+        "if type({v}) is not str:",
+        "    raise InvalidData",
+    ],
+    'bool': [
+        "if type({v}) is not bool:",
+        "    raise InvalidData",
+    ],
+    'extensions': ["{v} = decode_extensions({v})"],
+    'int_list': ["{v} = decode_int_list({v})"],
+    'float_list': ["{v} = decode_float_list({v})"],
+    'str_list': ["{v} = decode_str_list({v})"],
+    'int_dict': ["{v} = decode_int_dict({v})"],
+    'int_dict_list': ["{v} = decode_int_dict_list({v})"],
+    'object': ["{v} = decode_{cls}({v})"],
+    'object_list': [
+        "if type({v}) is not list:",
+        "    raise InvalidData",
+        "{v} = [decode_{cls}(y) for y in {v}]",
+    ],
+}
+
+
+def generate_decoder_source(class_name, fields):
+    """Python source of the decoding function of a gltf2_io class."""
+    lines = [
+        "def decode_{}(obj):".format(class_name),
+        "    if type(obj) is not dict:",
+        "        raise InvalidData",
+        "    get = obj.get",
+    ]
+    variables = []
+    for parameter, key, kind, required in fields:
+        # Prefixed, as some parameters shadow builtins (type, min, max...)
+        variable = "value_" + parameter
+        variables.append(variable)
+        lines.append("    {} = get({!r})".format(variable, key))
+        if kind == 'any':
+            continue
+
+        if isinstance(kind, tuple):
+            kind, cls = kind
+        else:
+            cls = None
+        checks = [line.format(v=variable, cls=cls) for line in VALUE_CHECKS[kind]]
+
+        if required:
+            lines.extend("    " + line for line in checks)
+        else:
+            lines.append("    if {} is not None:".format(variable))
+            lines.extend("        " + line for line in checks)
+
+    lines.append("    return {}({})".format(class_name, ", ".join(variables)))
+    return "\n".join(lines)
+
+
+def compile_decoders():
+    namespace = {
+        'InvalidData': InvalidData,
+        'decode_extensions': decode_extensions,
+        'decode_int_list': decode_int_list,
+        'decode_float_list': decode_float_list,
+        'decode_str_list': decode_str_list,
+        'decode_int_dict': decode_int_dict,
+        'decode_int_dict_list': decode_int_dict_list,
+    }
+    for class_name, fields in FIELDS.items():
+        namespace[class_name] = getattr(gltf2_io, class_name)
+        exec(compile(generate_decoder_source(class_name, fields), "<gltf2_io decoder {}>".format(class_name), 'exec'),
+             namespace)
+    return namespace
+
+
+DECODERS = compile_decoders()
+
+
+def gltf_from_dict(obj):
+    """Decode glTF JSON data. Invalid data is decoded again by gltf2_io, to report errors."""
+    try:
+        return DECODERS['decode_Gltf'](obj)
+    except InvalidData:
+        return gltf2_io.gltf_from_dict(obj)
@@ -17,6 +17,8 @@ from io_scene_gltf2.io.com.gltf2_io import *
 
 class LightSpot:
     """light/spot"""
+    __slots__ = ('inner_cone_angle', 'outer_cone_angle')
+
     def __init__(self, inner_cone_angle, outer_cone_angle):
         self.inner_cone_angle = inner_cone_angle
         self.outer_cone_angle = outer_cone_angle
@@ -37,6 +39,8 @@ class LightSpot:
 
 class Light:
     """defines a set of lights for use with glTF 2.0. Lights define light sources within a scene"""
+    __slots__ = ('color', 'intensity', 'spot', 'type', 'range', 'name', 'extensions', 'extras')
+
     def __init__(self, color, intensity, spot, type, range, name, extensions, extras):
         self.color = color
         self.intensity = intensity
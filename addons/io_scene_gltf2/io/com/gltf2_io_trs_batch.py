@@ -0,0 +1,91 @@
+# Copyright 2019 The glTF-Blender-IO authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+
+class BatchTRS:
+    """TRS computations for all nodes at once.
+
+    Matrices are (N, 4, 4) arrays, row major (matrix[i, row, column]), unlike glTF column major lists.
+    """
+
+    def __new__(cls, *args, **kwargs):
+        raise RuntimeError("{} should not be instantiated".format(cls.__name__))
+
+    @staticmethod
+    def local_matrices(nodes):
+        """Local matrices of nodes, from their matrix or their translation / rotation / scale."""
+        nb_nodes = len(nodes)
+        translations = np.zeros((nb_nodes, 3))
+        rotations = np.tile(np.array([0.0, 0.0, 0.0, 1.0]), (nb_nodes, 1))
+        scales = np.ones((nb_nodes, 3))
+        matrix_nodes = []
+        for node_idx, node in enumerate(nodes):
+            if node.matrix:
+                matrix_nodes.append(node_idx)
+                continue
+            if node.translation:
+                translations[node_idx] = node.translation
+            if node.rotation:
+                rotations[node_idx] = node.rotation
+            if node.scale:
+                scales[node_idx] = node.scale
+
+        matrices = BatchTRS.compose(translations, rotations, scales)
+
+        for node_idx in matrix_nodes:
+            matrices[node_idx] = np.array(nodes[node_idx].matrix, dtype=np.float64).reshape(4, 4).T
+
+        return matrices
+
+    @staticmethod
+    def compose(translations, rotations, scales):
+        """Compose translations (N, 3), quaternions (N, 4) as x, y, z, w and scales (N, 3) into matrices."""
+        # TODO : are quaternions normalized ? --> if not, multiply by 1/(w*w + x*x + y*y + z*z)
+        x, y, z, w = rotations.T
+
+        matrices = np.zeros((len(translations), 4, 4))
+        matrices[:, 0, 0] = 1 - 2 * y * y - 2 * z * z
+        matrices[:, 0, 1] = 2 * x * y - 2 * w * z
+        matrices[:, 0, 2] = 2 * x * z + 2 * y * w
+        matrices[:, 1, 0] = 2 * x * y + 2 * w * z
+        matrices[:, 1, 1] = 1 - 2 * x * x - 2 * z * z
+        matrices[:, 1, 2] = 2 * y * z - 2 * w * x
+        matrices[:, 2, 0] = 2 * x * z - 2 * w * y
+        matrices[:, 2, 1] = 2 * y * z + 2 * w * x
+        matrices[:, 2, 2] = 1 - 2 * x * x - 2 * y * y
+
+        # Scale is applied first, so it scales rotation columns
+        matrices[:, :3, :3] *= scales[:, np.newaxis, :]
+        matrices[:, :3, 3] = translations
+        matrices[:, 3, 3] = 1.0
+
+        return matrices
+
+    @staticmethod
+    def world_matrices(local_matrices, parents):
+        """World matrices, composing each depth level of the hierarchy at once.
+
+        parents is an array of parent node index of each node, -1 for root nodes.
+        """
+        world_matrices = local_matrices.copy()
+
+        level = np.flatnonzero(parents < 0)
+        while len(level) > 0:
+            children = np.flatnonzero(np.isin(parents, level))
+            world_matrices[children] = np.matmul(world_matrices[parents[children]], local_matrices[children])
+            level = children
+
+        return world_matrices
@@ -0,0 +1,61 @@
+# Copyright 2019 The glTF-Blender-IO authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import OrderedDict
+
+
+class AccessorCache():
+    """Decoded accessor cache, bounded by size in bytes, with LRU eviction."""
+
+    def __init__(self, max_bytes):
+        """initialization."""
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.__data = OrderedDict()
+
+    def get(self, accessor_idx):
+        """Return cached array for this accessor, or None."""
+        data = self.__data.get(accessor_idx)
+        if data is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.__data.move_to_end(accessor_idx)
+        return data
+
+    def put(self, accessor_idx, data):
+        """Store decoded array. Arrays are made read only, as they are shared between callers."""
+        data.flags.writeable = False
+
+        if data.nbytes > self.max_bytes:
+            # Too big to be cached, keep the cache for smaller accessors
+            return
+
+        if accessor_idx in self.__data:
+            self.current_bytes -= self.__data.pop(accessor_idx).nbytes
+
+        self.__data[accessor_idx] = data
+        self.current_bytes += data.nbytes
+
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self.__data.popitem(last=False)
+            self.current_bytes -= evicted.nbytes
+
+    def clear(self):
+        """Release all cached arrays."""
+        self.__data.clear()
+        self.current_bytes = 0
@@ -12,8 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import struct
-import base64
+import numpy as np
 from os.path import dirname, join, isfile, basename
 
 
@@ -22,6 +21,14 @@ class BinaryData():
     def __new__(cls, *args, **kwargs):
         raise RuntimeError("%s should not be instantiated" % cls)
 
+    # Divisors used to map normalized integer components to [0, 1] or [-1, 1]
+    NORMALIZATION_DIVISORS = {
+        5120: 127.0,    # Byte
+        5121: 255.0,    # Unsigned Byte
+        5122: 32767.0,  # Short
+        5123: 65535.0,  # Unsigned Short
+    }
+
     @staticmethod
     def get_binary_from_accessor(gltf, accessor_idx):
         """Get binary from accessor."""
@@ -42,37 +49,51 @@ class BinaryData():
         if bufferview_offset is None:
             bufferview_offset = 0
 
-        return buffer[accessor_offset + bufferview_offset:accessor_offset + bufferview_offset + bufferView.byte_length]
+        return memoryview(buffer)[
+            accessor_offset + bufferview_offset:accessor_offset + bufferview_offset + bufferView.byte_length
+        ]
 
     @staticmethod
     def get_data_from_accessor(gltf, accessor_idx):
-        """Get data from accessor."""
-        accessor = gltf.data.accessors[accessor_idx]
+        """Get data from accessor, as a list of tuples.
 
-        bufferView = gltf.data.buffer_views[accessor.buffer_view]  # TODO initialize with 0 when not present!
-        buffer_data = BinaryData.get_binary_from_accessor(gltf, accessor_idx)
+        Compatibility shim for code still working on Python sequences,
+        new code should use decode_accessor instead.
+        """
+        data = BinaryData.decode_accessor(gltf, accessor_idx)
+        return [tuple(element) for element in data.tolist()]
+
+    @staticmethod
+    def decode_accessor(gltf, accessor_idx):
+        """Decode accessor into a numpy array of shape (count, components).
+
+        Arrays are cached for the whole import, and are read only.
+        """
+        data = gltf.accessor_cache.get(accessor_idx)
+        if data is None:
+            data = BinaryData.decode_accessor_uncached(gltf, accessor_idx)
+            gltf.accessor_cache.put(accessor_idx, data)
+        return data
 
-        fmt_char = gltf.fmt_char_dict[accessor.component_type]
+    @staticmethod
+    def decode_accessor_uncached(gltf, accessor_idx):
+        """Decode accessor, without using accessor cache."""
+        accessor = gltf.data.accessors[accessor_idx]
+
+        dtype = np.dtype('<' + gltf.fmt_char_dict[accessor.component_type])
         component_nb = gltf.component_nb_dict[accessor.type]
-        fmt = '<' + (fmt_char * component_nb)
-        stride_ = struct.calcsize(fmt)
-        # TODO data alignment stuff
 
-        if bufferView.byte_stride:
-            stride = bufferView.byte_stride
+        if accessor.buffer_view is not None:
+            bufferView = gltf.data.buffer_views[accessor.buffer_view]
+            buffer_data = BinaryData.get_binary_from_accessor(gltf, accessor_idx)
+            data = BinaryData.decode_view(buffer_data, dtype, accessor.count, component_nb, bufferView.byte_stride)
         else:
-            stride = stride_
-
-        data = []
-        offset = 0
-        while len(data) < accessor.count:
-            element = struct.unpack_from(fmt, buffer_data, offset)
-            data.append(element)
-            offset += stride
+            # No bufferView: all values are zeros (sparse accessors can then override some of them)
+            data = np.zeros((accessor.count, component_nb), dtype=dtype)
 
         if accessor.sparse:
-            sparse_indices_data = BinaryData.get_data_from_sparse(gltf, accessor.sparse, "indices")
-            sparse_values_values = BinaryData.get_data_from_sparse(
+            sparse_indices = BinaryData.get_data_from_sparse(gltf, accessor.sparse, "indices")
+            sparse_values = BinaryData.get_data_from_sparse(
                 gltf,
                 accessor.sparse,
                 "values",
@@ -81,31 +102,42 @@ class BinaryData():
             )
 
             # apply sparse
-            for cpt_idx, idx in enumerate(sparse_indices_data):
-                data[idx[0]] = sparse_values_values[cpt_idx]
+            if not data.flags.writeable:
+                data = data.copy()
+            data[sparse_indices[:, 0]] = sparse_values
 
         # Normalization
         if accessor.normalized:
-            for idx, tuple in enumerate(data):
-                new_tuple = ()
-                for i in tuple:
-                    if accessor.component_type == 5120:
-                        new_tuple += (max(float(i / 127.0 ), -1.0),)
-                    elif accessor.component_type == 5121:
-                        new_tuple += (float(i / 255.0),)
-                    elif accessor.component_type == 5122:
-                        new_tuple += (max(float(i / 32767.0), -1.0),)
-                    elif accessor.component_type == 5123:
-                        new_tuple += (i / 65535.0,)
-                    else:
-                        new_tuple += (float(i),)
-                data[idx] = new_tuple
+            data = data.astype(np.float32)
+            divisor = BinaryData.NORMALIZATION_DIVISORS.get(accessor.component_type)
+            if divisor is not None:
+                data /= divisor
+                if accessor.component_type in [5120, 5122]:
+                    np.maximum(data, -1.0, out=data)
 
         return data
 
+    @staticmethod
+    def decode_view(buffer_data, dtype, count, component_nb, byte_stride=None):
+        """Decode count elements of component_nb components, without copying buffer_data."""
+        element_size = dtype.itemsize * component_nb
+        # TODO data alignment stuff (padding of MAT2/MAT3 columns for 1 and 2 bytes components)
+
+        if not byte_stride or byte_stride == element_size:
+            data = np.frombuffer(buffer_data, dtype=dtype, count=count * component_nb)
+            return data.reshape(count, component_nb)
+
+        # Interleaved data: strided view on buffer
+        return np.ndarray(
+            shape=(count, component_nb),
+            dtype=dtype,
+            buffer=buffer_data,
+            strides=(byte_stride, dtype.itemsize)
+        )
+
     @staticmethod
     def get_data_from_sparse(gltf, sparse, type_, type_val=None, comp_type=None):
-        """Get data from sparse."""
+        """Get data from sparse, as a numpy array of shape (count, components)."""
         if type_ == "indices":
             bufferView = gltf.data.buffer_views[sparse.indices.buffer_view]
             offset = sparse.indices.byte_offset
@@ -124,25 +156,16 @@ class BinaryData():
             gltf.load_buffer(bufferView.buffer)
             buffer = gltf.buffers[bufferView.buffer]
 
-        bin_data = buffer[bufferView.byte_offset + offset:bufferView.byte_offset + offset + bufferView.byte_length]
-
-        fmt = '<' + (fmt_char * component_nb)
-        stride_ = struct.calcsize(fmt)
-        # TODO data alignment stuff ?
-
-        if bufferView.byte_stride:
-            stride = bufferView.byte_stride
-        else:
-            stride = stride_
+        bufferview_offset = bufferView.byte_offset
+        if bufferview_offset is None:
+            bufferview_offset = 0
+        if offset is None:
+            offset = 0
 
-        data = []
-        offset = 0
-        while len(data) < sparse.count:
-            element = struct.unpack_from(fmt, bin_data, offset)
-            data.append(element)
-            offset += stride
+        bin_data = memoryview(buffer)[bufferview_offset + offset:bufferview_offset + bufferView.byte_length]
 
-        return data
+        return BinaryData.decode_view(bin_data, np.dtype('<' + fmt_char), sparse.count, component_nb,
+                                      bufferView.byte_stride)
 
     @staticmethod
     def get_image_data(gltf, img_idx):
@@ -151,17 +174,14 @@ class BinaryData():
 
         image_name = "Image_" + str(img_idx)
 
-        if pyimage.uri:
-            sep = ';base64,'
-            if pyimage.uri[:5] == 'data:':
-                idx = pyimage.uri.find(sep)
-                if idx != -1:
-                    data = pyimage.uri[idx + len(sep):]
-                    return base64.b64decode(data), image_name
+        data = gltf.load_embedded_image(img_idx)
+        if data is not None:
+            return data, image_name
 
+        if pyimage.uri:
             if isfile(join(dirname(gltf.filename), pyimage.uri)):
-                with open(join(dirname(gltf.filename), pyimage.uri), 'rb') as f_:
-                    return f_.read(), basename(join(dirname(gltf.filename), pyimage.uri))
+                return gltf.load_image_file(img_idx, join(dirname(gltf.filename), pyimage.uri)), \
+                    basename(join(dirname(gltf.filename), pyimage.uri))
             else:
                 gltf.log.error("Missing file (index " + str(img_idx) + "): " + pyimage.uri)
                 return None, None
@@ -183,4 +203,4 @@ class BinaryData():
         if bufferview_offset is None:
             bufferview_offset = 0
 
-        return buffer[bufferview_offset:bufferview_offset + bufferView.byte_length], image_name
+        return memoryview(buffer)[bufferview_offset:bufferview_offset + bufferView.byte_length], image_name
@@ -12,27 +12,67 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from ..com.gltf2_io import gltf_from_dict
+from ..com.gltf2_io_fast_decoder import gltf_from_dict
 from ..com.gltf2_io_debug import Log
+from .gltf2_io_accessor_cache import AccessorCache
+from .gltf2_io_selection import ImportSelection
 import logging
 import json
 import struct
 import base64
-from os.path import dirname, join, getsize, isfile
+import binascii
+import mmap
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from os.path import dirname, join, isfile
 
 
 class glTFImporter():
     """glTF Importer class."""
 
+    # Base64 data URIs are decoded by chunks of this number of characters (multiple of 4)
+    DATA_URI_CHUNK_SIZE = 4 * 1024 * 1024
+    # Data URIs decoding to more bytes than this are decoded in a temporary file, then mapped in memory
+    DATA_URI_TEMP_FILE_SIZE = 64 * 1024 * 1024
+
     def __init__(self, filename, import_settings):
         """initialization."""
         self.filename = filename
         self.import_settings = import_settings
         self.buffers = {}
+        # File mappings (mmap) to close at end of import
+        self.mappings = []
+        # Decoded data URI images, by image index
+        self.embedded_images = {}
+        # Files being loaded in background, by buffer / image index
+        self.buffer_futures = {}
+        self.image_futures = {}
 
         if 'loglevel' not in self.import_settings.keys():
             self.import_settings['loglevel'] = logging.ERROR
 
+        # Decoded accessors are shared between mesh, skin and animation passes
+        if 'accessor_cache_max_bytes' not in self.import_settings.keys():
+            self.import_settings['accessor_cache_max_bytes'] = 512 * 1024 * 1024
+        self.accessor_cache = AccessorCache(self.import_settings['accessor_cache_max_bytes'])
+
+        # Number of threads loading external buffers and images in background
+        if 'prefetch_max_workers' not in self.import_settings.keys():
+            self.import_settings['prefetch_max_workers'] = 4
+
+        # Partial import: scene index or name, node name pattern, node indices. Empty imports everything
+        for setting in ['import_scene', 'import_node_names', 'import_node_indices']:
+            if setting not in self.import_settings.keys():
+                self.import_settings[setting] = ''
+        # node -> parent node, built by compute_node_parents()
+        self.node_parents = None
+        # Set by select(), None when all is imported
+        self.selected_scene = None
+        self.selected_roots = None
+        self.selected_nodes = None
+        self.selected_buffers = None
+        self.selected_images = None
+
         log = Log(import_settings['loglevel'])
         self.log = log.logger
         self.log_handler = log.hdlr
@@ -92,6 +132,51 @@ class glTFImporter():
 
         return True, None
 
+    def compute_node_parents(self):
+        """Build node -> parent node index once, and return it."""
+        if self.node_parents is None:
+            self.node_parents = {}
+            for node_idx, node in enumerate(self.data.nodes or []):
+                if node.children:
+                    for child_idx in node.children:
+                        self.node_parents[child_idx] = node_idx
+        return self.node_parents
+
+    def select(self):
+        """Resolve partial import settings into the nodes to create, and the buffers and images they use."""
+        try:
+            self.selected_scene = ImportSelection.get_scene(self, self.import_settings['import_scene'])
+            names_pattern = self.import_settings['import_node_names']
+            indices = ImportSelection.get_node_indices(
+                self.import_settings['import_node_indices'], len(self.data.nodes or [])
+            )
+            if not names_pattern and not indices:
+                if self.selected_scene is not None:
+                    self.selected_roots = self.data.scenes[self.selected_scene].nodes or []
+                    self.selected_nodes = ImportSelection.get_subtrees(self, self.selected_roots)
+            else:
+                if self.selected_scene is None and self.data.scenes:
+                    # Objects are created in default scene
+                    self.selected_scene = self.data.scene if self.data.scene is not None else 0
+                    scene_filter = None
+                else:
+                    scene_filter = self.selected_scene
+                self.selected_roots, self.selected_nodes = ImportSelection.select_nodes(
+                    self, scene_filter, names_pattern, indices
+                )
+        except ValueError as e:
+            return False, e.args[0]
+
+        if self.selected_nodes is not None:
+            self.selected_buffers, self.selected_images = ImportSelection.get_referenced_data(
+                self, self.selected_nodes
+            )
+            self.log.info("Partial import: " + str(len(self.selected_nodes)) + " nodes, "
+                          + str(len(self.selected_buffers)) + " buffers, "
+                          + str(len(self.selected_images)) + " images")
+
+        return True, None
+
     def load_glb(self):
         """Load binary glb."""
         header = struct.unpack_from('<4sII', self.content)
@@ -105,7 +190,7 @@ class glTFImporter():
         if self.version != 2:
             return False, "glTF version doesn't match to 2"
 
-        if self.file_size != getsize(self.filename):
+        if self.file_size != len(self.content):
             return False, "File size doesn't match"
 
         offset = 12  # header size = 12
@@ -117,7 +202,7 @@ class glTFImporter():
         if len_ != len(str_json):
             return False, "Length of json part doesn't match"
         try:
-            json_ = json.loads(str_json.decode('utf-8'), parse_constant=glTFImporter.bad_json_value)
+            json_ = json.loads(str(str_json, 'utf-8'), parse_constant=glTFImporter.bad_json_value)
             self.data = gltf_from_dict(json_)
         except ValueError as e:
             return False, e.args[0]
@@ -136,7 +221,7 @@ class glTFImporter():
         return True, None
 
     def load_chunk(self, offset):
-        """Load chunk."""
+        """Load chunk (data is a view on file content, not a copy)."""
         chunk_header = struct.unpack_from('<I4s', self.content, offset)
         data_length = chunk_header[0]
         data_type = chunk_header[1]
@@ -151,21 +236,19 @@ class glTFImporter():
             return False, "Please select a file"
 
         # Check if file is gltf or glb
-        with open(self.filename, 'rb') as f:
-            self.content = f.read()
+        self.content = self.track_mapping(glTFImporter.map_file(self.filename))
 
         self.is_glb_format = self.content[:4] == b'glTF'
 
         # glTF file
         if not self.is_glb_format:
+            content = self.content
             self.content = None
-            with open(self.filename, 'r') as f:
-                content = f.read()
-                try:
-                    self.data = gltf_from_dict(json.loads(content, parse_constant=glTFImporter.bad_json_value))
-                    return True, None
-                except ValueError as e:
-                    return False, e.args[0]
+            try:
+                self.data = gltf_from_dict(json.loads(str(content, 'utf-8'), parse_constant=glTFImporter.bad_json_value))
+                return True, None
+            except ValueError as e:
+                return False, e.args[0]
 
         # glb file
         else:
@@ -173,29 +256,195 @@ class glTFImporter():
             success, txt = self.load_glb()
             return success, txt
 
-    def is_node_joint(self, node_idx):
-        """Check if node is a joint."""
-        if not self.data.skins:  # if no skin in gltf file
-            return False, None
-
-        for skin_idx, skin in enumerate(self.data.skins):
-            if node_idx in skin.joints:
-                return True, skin_idx
+    def prefetch(self):
+        """Start loading external buffers and images in background threads.
+
+        Data are then waited for only when needed, instead of serializing all file reads with Blender
+        data creation. For partial import, only files used by selected nodes are loaded.
+        """
+        files = []
+        if self.data.buffers is not None:
+            for buffer_idx, buffer in enumerate(self.data.buffers):
+                if self.selected_buffers is not None and buffer_idx not in self.selected_buffers:
+                    continue
+                if buffer.uri and buffer.uri[:5] != 'data:':
+                    path = join(dirname(self.filename), buffer.uri)
+                    if isfile(path):
+                        files.append((self.buffer_futures, buffer_idx, path))
+        if self.data.images is not None:
+            for img_idx, pyimage in enumerate(self.data.images):
+                if self.selected_images is not None and img_idx not in self.selected_images:
+                    continue
+                if pyimage.uri and pyimage.uri[:5] != 'data:':
+                    path = join(dirname(self.filename), pyimage.uri)
+                    if isfile(path):
+                        files.append((self.image_futures, img_idx, path))
+
+        if not files:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=self.import_settings['prefetch_max_workers'])
+        for futures, idx, path in files:
+            futures[idx] = executor.submit(glTFImporter.prefetch_file, path)
+        # Threads finish submitted loads, then exit
+        executor.shutdown(wait=False)
 
-        return False, None
+    @staticmethod
+    def prefetch_file(filename):
+        """Read file once, so its pages are cached when used, then map it."""
+        chunk = bytearray(1024 * 1024)
+        with open(filename, 'rb', buffering=0) as f:
+            while f.readinto(chunk):
+                pass
+        return glTFImporter.map_file(filename)
 
     def load_buffer(self, buffer_idx):
         """Load buffer."""
         buffer = self.data.buffers[buffer_idx]
 
+        if buffer_idx in self.buffer_futures.keys():
+            self.buffers[buffer_idx] = self.track_mapping(self.buffer_futures.pop(buffer_idx).result())
+            return
+
         if buffer.uri:
-            sep = ';base64,'
-            if buffer.uri[:5] == 'data:':
-                idx = buffer.uri.find(sep)
-                if idx != -1:
-                    data = buffer.uri[idx + len(sep):]
-                    self.buffers[buffer_idx] = base64.b64decode(data)
-                    return
-
-            with open(join(dirname(self.filename), buffer.uri), 'rb') as f_:
-                self.buffers[buffer_idx] = f_.read()
+            data = self.track_mapping(glTFImporter.decode_data_uri(buffer.uri))
+            if data is not None:
+                self.buffers[buffer_idx] = data
+                # Decoded data is now the only copy of the payload
+                buffer.uri = None
+                return
+
+            self.buffers[buffer_idx] = self.track_mapping(
+                glTFImporter.map_file(join(dirname(self.filename), buffer.uri))
+            )
+
+    def load_image_file(self, img_idx, filename):
+        """Load image file, waiting for its prefetch if any."""
+        if img_idx in self.image_futures.keys():
+            return self.track_mapping(self.image_futures.pop(img_idx).result())
+        return self.track_mapping(glTFImporter.map_file(filename))
+
+    def load_embedded_image(self, img_idx):
+        """Decode data URI of image, if any. Returns decoded data, or None."""
+        if img_idx in self.embedded_images.keys():
+            return self.embedded_images[img_idx]
+
+        pyimage = self.data.images[img_idx]
+        if not pyimage.uri:
+            return None
+
+        data = self.track_mapping(glTFImporter.decode_data_uri(pyimage.uri))
+        if data is not None:
+            self.embedded_images[img_idx] = data
+            # Decoded data is now the only copy of the payload
+            pyimage.uri = None
+        return data
+
+    @staticmethod
+    def decode_data_uri(uri):
+        """Decode a base64 data URI, returns a memoryview on decoded data, or None if uri is not a base64 data URI.
+
+        Payload is decoded by chunks into a preallocated buffer (or a mapped temporary file for large payloads),
+        so encoded string, decoded data and intermediate copies are never all in memory at the same time.
+        """
+        sep = ';base64,'
+        if uri[:5] != 'data:':
+            return None
+        start = uri.find(sep)
+        if start == -1:
+            return None
+        start += len(sep)
+
+        payload_length = len(uri) - start
+        if payload_length % 4 != 0:
+            # Not a canonical payload, let base64 module deal with it (or report the error)
+            return memoryview(base64.b64decode(uri[start:]))
+        padding = (uri[-2:] == '==') + (uri[-1:] == '=')
+        size = payload_length // 4 * 3 - padding
+
+        if size > glTFImporter.DATA_URI_TEMP_FILE_SIZE:
+            with tempfile.TemporaryFile() as f:
+                if not glTFImporter.decode_base64_chunks(uri, start, size, f.write):
+                    return memoryview(base64.b64decode(uri[start:]))
+                f.flush()
+                return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+        data = bytearray(size)
+        view = memoryview(data)
+        offset = 0
+
+        def write(chunk):
+            nonlocal offset
+            view[offset:offset + len(chunk)] = chunk
+            offset += len(chunk)
+
+        if not glTFImporter.decode_base64_chunks(uri, start, size, write):
+            return memoryview(base64.b64decode(uri[start:]))
+        return view
+
+    @staticmethod
+    def decode_base64_chunks(uri, start, size, write):
+        """Decode base64 payload of uri by chunks, passing them to write.
+
+        Returns False if payload does not decode to size bytes (for example if it contains characters
+        outside of the base64 alphabet), nothing is written past size in this case.
+        """
+        written = 0
+        for chunk_start in range(start, len(uri), glTFImporter.DATA_URI_CHUNK_SIZE):
+            try:
+                chunk = binascii.a2b_base64(uri[chunk_start:chunk_start + glTFImporter.DATA_URI_CHUNK_SIZE])
+            except binascii.Error:
+                return False
+            if written + len(chunk) > size:
+                return False
+            write(chunk)
+            written += len(chunk)
+
+        return written == size
+
+    def track_mapping(self, view):
+        """Keep track of the mapping behind view (if any), to close it in close(). Returns view."""
+        if view is not None and isinstance(view.obj, mmap.mmap):
+            self.mappings.append(view.obj)
+        return view
+
+    def close(self):
+        """Release loaded data and close file mappings, so that files are not kept open (and locked on Windows)."""
+        for futures in [self.buffer_futures, self.image_futures]:
+            for future in futures.values():
+                if not future.cancel():
+                    try:
+                        self.track_mapping(future.result())
+                    except (OSError, ValueError) as e:
+                        # Prefetched file was not used, its loading error doesn't matter
+                        self.log.warning("Prefetch failed: " + str(e))
+            futures.clear()
+
+        # Drop views (and arrays decoded from them) before closing mappings
+        self.accessor_cache.clear()
+        self.buffers.clear()
+        self.embedded_images.clear()
+        self.content = None
+
+        for mapping in self.mappings:
+            try:
+                mapping.close()
+            except BufferError:
+                # A view is still in use, mapping will be closed when it is released
+                self.log.warning("A file mapping is still in use, it can't be closed yet")
+        self.mappings = []
+
+    @staticmethod
+    def map_file(filename):
+        """Map file in memory (read only), and return a memoryview on it.
+
+        Slicing the memoryview gives views into the mapping, so buffers, accessors
+        and images can be read without copying the file content.
+        """
+        with open(filename, 'rb') as f:
+            try:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files can't be mapped
+                return memoryview(b'')
+        return memoryview(mapping)
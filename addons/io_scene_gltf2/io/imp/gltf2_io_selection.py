@@ -0,0 +1,200 @@
+# Copyright 2019 The glTF-Blender-IO authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from fnmatch import fnmatchcase
+
+
+class ImportSelection():
+    """Partial import: nodes to import, and glTF data they reference."""
+    def __new__(cls, *args, **kwargs):
+        raise RuntimeError("%s should not be instantiated" % cls)
+
+    @staticmethod
+    def get_scene(gltf, scene_setting):
+        """Scene index from an index or a name. Returns None if setting is empty, raises ValueError if not found."""
+        if scene_setting is None or scene_setting == '':
+            return None
+
+        scenes = gltf.data.scenes or []
+        if isinstance(scene_setting, int) or scene_setting.strip().isdigit():
+            scene_idx = int(scene_setting)
+            if not 0 <= scene_idx < len(scenes):
+                raise ValueError("Scene " + str(scene_idx) + " not found")
+            return scene_idx
+
+        for scene_idx, scene in enumerate(scenes):
+            if scene.name == scene_setting:
+                return scene_idx
+        raise ValueError("Scene " + scene_setting + " not found")
+
+    @staticmethod
+    def get_node_indices(indices_setting, nb_nodes):
+        """Node indices, from a list or a comma separated string. Raises ValueError if an index is out of range."""
+        if indices_setting is None or indices_setting == '':
+            return set()
+        if isinstance(indices_setting, str):
+            try:
+                indices = set(int(idx) for idx in indices_setting.replace(',', ' ').split())
+            except ValueError:
+                raise ValueError("Node indices must be integers, separated by commas")
+        else:
+            indices = set(indices_setting)
+
+        for node_idx in sorted(indices):
+            if not 0 <= node_idx < nb_nodes:
+                raise ValueError("Node " + str(node_idx) + " not found")
+        return indices
+
+    @staticmethod
+    def get_subtrees(gltf, root_node_ids):
+        """All nodes of the trees of root nodes."""
+        nodes = set()
+        stack = list(root_node_ids)
+        while stack:
+            node_idx = stack.pop()
+            if node_idx in nodes:
+                continue
+            nodes.add(node_idx)
+            if gltf.data.nodes[node_idx].children:
+                stack.extend(gltf.data.nodes[node_idx].children)
+        return nodes
+
+    @staticmethod
+    def get_top_nodes(node_ids, parents):
+        """Nodes without an ancestor in node_ids, in index order."""
+        top_nodes = []
+        for node_idx in sorted(node_ids):
+            parent = parents.get(node_idx)
+            while parent is not None and parent not in node_ids:
+                parent = parents.get(parent)
+            if parent is None:
+                top_nodes.append(node_idx)
+        return top_nodes
+
+    @staticmethod
+    def select_nodes(gltf, scene_idx, names_pattern, indices):
+        """Root nodes of the selection, and all nodes to import.
+
+        Skinned meshes bring the trees of their joints, so that their armature is imported too.
+        """
+        parents = gltf.compute_node_parents()
+
+        if scene_idx is not None:
+            candidates = ImportSelection.get_subtrees(gltf, gltf.data.scenes[scene_idx].nodes or [])
+        else:
+            candidates = range(len(gltf.data.nodes or []))
+
+        matched = set(
+            node_idx for node_idx in candidates
+            if node_idx in indices or
+            (names_pattern and gltf.data.nodes[node_idx].name and
+             fnmatchcase(gltf.data.nodes[node_idx].name, names_pattern))
+        )
+        if not matched:
+            raise ValueError("No node matches the import selection")
+
+        roots = ImportSelection.get_top_nodes(matched, parents)
+        nodes = ImportSelection.get_subtrees(gltf, roots)
+        while True:
+            missing_joints = set()
+            for node_idx in nodes:
+                node = gltf.data.nodes[node_idx]
+                if node.skin is not None and node.mesh is not None:
+                    missing_joints.update(
+                        joint for joint in gltf.data.skins[node.skin].joints if joint not in nodes
+                    )
+            if not missing_joints:
+                break
+
+            # Selected roots first, as first root becomes the active object
+            new_roots = ImportSelection.get_top_nodes(set(roots) | missing_joints, parents)
+            roots = [root for root in roots if root in new_roots] + \
+                [root for root in new_roots if root not in roots]
+            nodes = ImportSelection.get_subtrees(gltf, roots)
+
+        return roots, nodes
+
+    @staticmethod
+    def get_referenced_data(gltf, node_ids):
+        """Buffers and images used by nodes: meshes, materials, skins and animations targeting them."""
+        accessors = set()
+        materials = set()
+        skins = set()
+
+        for node_idx in node_ids:
+            node = gltf.data.nodes[node_idx]
+            if node.skin is not None:
+                skins.add(node.skin)
+            if node.mesh is not None:
+                for prim in gltf.data.meshes[node.mesh].primitives:
+                    accessors.update(prim.attributes.values())
+                    if prim.indices is not None:
+                        accessors.add(prim.indices)
+                    for target in prim.targets or []:
+                        accessors.update(target.values())
+                    if prim.material is not None:
+                        materials.add(prim.material)
+
+        # Joints are created in armature of their first skin
+        for skin_idx, skin in enumerate(gltf.data.skins or []):
+            if not node_ids.isdisjoint(skin.joints):
+                skins.add(skin_idx)
+        for skin_idx in skins:
+            if gltf.data.skins[skin_idx].inverse_bind_matrices is not None:
+                accessors.add(gltf.data.skins[skin_idx].inverse_bind_matrices)
+
+        for animation in gltf.data.animations or []:
+            for channel in animation.channels:
+                if channel.target.node in node_ids:
+                    accessors.add(animation.samplers[channel.sampler].input)
+                    accessors.add(animation.samplers[channel.sampler].output)
+
+        images = set()
+        for material_idx in materials:
+            for texture_idx in ImportSelection.get_material_textures(gltf.data.materials[material_idx]):
+                if gltf.data.textures[texture_idx].source is not None:
+                    images.add(gltf.data.textures[texture_idx].source)
+
+        buffer_views = set()
+        for accessor_idx in accessors:
+            accessor = gltf.data.accessors[accessor_idx]
+            if accessor.buffer_view is not None:
+                buffer_views.add(accessor.buffer_view)
+            if accessor.sparse:
+                buffer_views.add(accessor.sparse.indices.buffer_view)
+                buffer_views.add(accessor.sparse.values.buffer_view)
+        for image_idx in images:
+            if gltf.data.images[image_idx].buffer_view is not None:
+                buffer_views.add(gltf.data.images[image_idx].buffer_view)
+
+        buffers = set(gltf.data.buffer_views[buffer_view].buffer for buffer_view in buffer_views)
+
+        return buffers, images
+
+    @staticmethod
+    def get_material_textures(pymaterial):
+        """Texture indices used by material."""
+        texture_infos = [pymaterial.normal_texture, pymaterial.occlusion_texture, pymaterial.emissive_texture]
+        if pymaterial.pbr_metallic_roughness:
+            texture_infos.append(pymaterial.pbr_metallic_roughness.base_color_texture)
+            texture_infos.append(pymaterial.pbr_metallic_roughness.metallic_roughness_texture)
+        textures = [texture_info.index for texture_info in texture_infos if texture_info is not None]
+
+        if pymaterial.extensions is not None and 'KHR_materials_pbrSpecularGlossiness' in pymaterial.extensions.keys():
+            pbrSG = pymaterial.extensions['KHR_materials_pbrSpecularGlossiness']
+            for texture in ['diffuseTexture', 'specularGlossinessTexture']:
+                if texture in pbrSG.keys():
+                    textures.append(pbrSG[texture]['index'])
+
+        return textures
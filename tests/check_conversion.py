@@ -0,0 +1,49 @@
+# Copyright (c) 2018 The Khronos Group Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Checks numpy conversions against mathutils, run by Blender
+
+import math
+import sys
+
+import numpy as np
+from mathutils import Matrix, Vector
+
+try:
+    from io_scene_gltf2.blender.com.gltf2_blender_conversion import matrices_to_quaternions
+
+    # Rotations close to pi, where Blender switches from w to x / y / z cases.
+    # Axes with negative components, so that each case gives a different quaternion sign
+    axes = [(1, 0, 0), (-1, 0, 0), (0, -1, 0), (0, 0, -1), (-0.6, -0.8, 0.1), (0.2, -0.3, -0.9), (-0.5, 0.5, -0.7)]
+    deltas = [0.5, 0.1, 0.05, 0.03, 0.01, 0.005, 0.003, 0.001, 0.0001, 0.0]
+    mats = []
+    for axis in axes:
+        for delta in deltas:
+            mat = Matrix.Rotation(math.pi - delta, 3, Vector(axis).normalized())
+            mats.append(mat)
+            # Scaled matrix too, as columns are normalized first
+            scaled = mat.copy()
+            for col_idx, scale in enumerate((2.0, 3.0, 0.5)):
+                scaled.col[col_idx] = scaled.col[col_idx] * scale
+            mats.append(scaled)
+
+    result = matrices_to_quaternions(np.array([[list(row) for row in mat] for mat in mats]))
+    for mat, q in zip(mats, result):
+        expected = mat.to_quaternion()
+        if max(abs(a - b) for a, b in zip(q, expected)) > 1e-5:
+            raise AssertionError("matrices_to_quaternions gives " + str(list(q)) + " for " + str(mat) +
+                                 ", Matrix.to_quaternion gives " + str(list(expected)))
+except Exception as err:
+    print(err, file=sys.stderr)
+    sys.exit(1)
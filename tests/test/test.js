@@ -496,6 +496,22 @@ describe('Exporter', function() {
     });
 });
 
+describe('Conversion', function() {
+    blenderVersions.forEach(function(blenderVersion) {
+        it(blenderVersion + ' converts matrices to quaternions as mathutils', function(done) {
+            const { exec } = require('child_process');
+            const cmd = `${blenderVersion} -b --addons io_scene_gltf2 -noaudio --python check_conversion.py`;
+            exec(cmd, (error, stdout, stderr) => {
+                if (error) {
+                    done(new Error(stderr));
+                    return;
+                }
+                done();
+            });
+        });
+    });
+});
+
 describe('Importer / Exporter (Roundtrip)', function() {
     blenderVersions.forEach(function(blenderVersion) {
         let variants = [